@@ -107,7 +107,7 @@ def main():
         mgr.merger_tree_root,
         "gamedata/levels/activities/act7fun/level_act7fun_01.openbachelorm",
     )
-    ab_filename = mgr.get_merger_bundle_filepath(node.bundle_name)
+    ab_filename = mgr.materialize_merger_bundle(node.bundle_name)
     asset_env = UnityPy.load(ab_filename.as_posix())
     for i in range(1, 7):
         level_id = f"level_act7fun_0{i}"
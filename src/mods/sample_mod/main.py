@@ -1,6 +1,7 @@
-from openbachelorm.resource import Resource
+from openbachelorm.resource import Resource, TableMod
 from openbachelorm.helper import (
     get_known_table_decorator_lst,
+    get_known_table_view_decorator_lst,
     get_mod_level_decorator_lst,
     get_known_table_asset_name_prefix,
 )
@@ -8,17 +9,24 @@ from openbachelorm.const import KnownTable
 from openbachelorm.const import get_last_res_version_android
 
 
-def do_mod_character_table(character_table):
-    for char in character_table["characters"]:
-        if char["key"] == "char_1035_wisdel":
-            data = char["value"]["phases"][-1]["attributesKeyFrames"][-1]["data"]
+WISDEL_DATA_PATH = [
+    "characters",
+    "char_1035_wisdel",
+    "value",
+    "phases",
+    -1,
+    "attributesKeyFrames",
+    -1,
+    "data",
+]
 
-            data["maxHp"] *= 100
-            data["atk"] *= 100
 
-            data["cost"] = 1
-
-    return character_table
+# scalars only, so they are overwritten inside the original buffer
+CHARACTER_TABLE_PATCH_LST = [
+    ([*WISDEL_DATA_PATH, "maxHp"], lambda v: v * 100),
+    ([*WISDEL_DATA_PATH, "atk"], lambda v: v * 100),
+    ([*WISDEL_DATA_PATH, "cost"], 1),
+]
 
 
 def do_mod_skill_table(skill_table):
@@ -88,35 +96,40 @@ def do_mod_level(level):
 def build_sample_mod(client_version: str, res_version: str):
     res = Resource(client_version, res_version)
 
-    res.mod_table(
+    res.patch_table(
         KnownTable.CHARACTER_TABLE.value,
-        do_mod_character_table,
-        get_known_table_decorator_lst(
+        CHARACTER_TABLE_PATCH_LST,
+        get_known_table_view_decorator_lst(
             KnownTable.CHARACTER_TABLE, client_version, res_version
         ),
         table_asset_name_prefix=get_known_table_asset_name_prefix(
             KnownTable.CHARACTER_TABLE
         ),
     )
-    res.mod_table(
-        KnownTable.SKILL_TABLE.value,
-        do_mod_skill_table,
-        get_known_table_decorator_lst(
-            KnownTable.SKILL_TABLE, client_version, res_version
-        ),
-        table_asset_name_prefix=get_known_table_asset_name_prefix(
-            KnownTable.SKILL_TABLE
-        ),
-    )
-    res.mod_table(
-        KnownTable.RANGE_TABLE.value,
-        do_mod_range_table,
-        get_known_table_decorator_lst(
-            KnownTable.RANGE_TABLE, client_version, res_version
-        ),
-        table_asset_name_prefix=get_known_table_asset_name_prefix(
-            KnownTable.RANGE_TABLE
-        ),
+
+    res.mod_table_many(
+        [
+            TableMod(
+                KnownTable.SKILL_TABLE.value,
+                do_mod_skill_table,
+                get_known_table_view_decorator_lst(
+                    KnownTable.SKILL_TABLE, client_version, res_version
+                ),
+                table_asset_name_prefix=get_known_table_asset_name_prefix(
+                    KnownTable.SKILL_TABLE
+                ),
+            ),
+            TableMod(
+                KnownTable.RANGE_TABLE.value,
+                do_mod_range_table,
+                get_known_table_decorator_lst(
+                    KnownTable.RANGE_TABLE, client_version, res_version
+                ),
+                table_asset_name_prefix=get_known_table_asset_name_prefix(
+                    KnownTable.RANGE_TABLE
+                ),
+            ),
+        ]
     )
     res.mod_level(
         LEVEL_ID,
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import zlib
+from pathlib import Path
+from uuid import uuid4
+
+import bson
+from bson.codec_options import CodecOptions, TypeDecoder, TypeRegistry
+from bson.errors import BSONError
+from bson.int64 import Int64
+
+from .config import config
+from .const import DECODE_CACHE_DIRPATH, MANIFEST_SNAPSHOT_DIRPATH
+
+DECODE_CACHE_SUFFIX = ".bin"
+
+DEFAULT_DECODE_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+
+class Int64Decoder(TypeDecoder):
+    bson_type = Int64
+
+    def transform_bson(self, value):
+        return int(value)
+
+
+# a cache hit must hand out the same plain ints as a fresh decode
+DECODE_CACHE_CODEC_OPTIONS = CodecOptions(type_registry=TypeRegistry([Int64Decoder()]))
+
+# for chains that decode bson themselves, whose Int64 values must stay Int64
+# so that they are encoded back as int64
+KEEP_INT64_CODEC_OPTIONS = CodecOptions()
+
+
+def is_decode_cache_enabled() -> bool:
+    return config.get("decode_cache", True)
+
+
+def get_decode_cache_max_size() -> int:
+    return config.get("decode_cache_max_size", DEFAULT_DECODE_CACHE_MAX_SIZE)
+
+
+def get_decode_cache_key(data: bytes | str, codec_name_lst: list[str]) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8", "surrogateescape")
+
+    h = hashlib.sha256(data)
+
+    for codec_name in codec_name_lst:
+        h.update(b"\0")
+        h.update(codec_name.encode("utf-8"))
+
+    return h.hexdigest()
+
+
+def get_decode_cache_filepath(key: str) -> Path:
+    return Path(DECODE_CACHE_DIRPATH, key).with_suffix(DECODE_CACHE_SUFFIX)
+
+
+def dump_cache_bytes(obj) -> bytes | None:
+    try:
+        return zlib.compress(bson.encode({"obj": obj}), 1)
+    except (BSONError, OverflowError):
+        # e.g. ulong values beyond int64, just leave them uncached
+        return None
+
+
+def read_cache_file(
+    cache_filepath: Path, codec_options: CodecOptions = DECODE_CACHE_CODEC_OPTIONS
+):
+    try:
+        cache_bytes = cache_filepath.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    try:
+        return bson.decode(zlib.decompress(cache_bytes), codec_options)["obj"]
+    except (zlib.error, BSONError, KeyError):
+        cache_filepath.unlink(missing_ok=True)
+        return None
+
+
+def write_cache_file(cache_filepath: Path, cache_bytes: bytes):
+    cache_filepath.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_filepath = cache_filepath.with_name(f"{uuid4()}.tmp")
+
+    try:
+        tmp_filepath.write_bytes(cache_bytes)
+        tmp_filepath.replace(cache_filepath)
+    finally:
+        tmp_filepath.unlink(missing_ok=True)
+
+
+def load_decode_cache(key: str, keep_int64: bool = False):
+    decode_cache_filepath = get_decode_cache_filepath(key)
+
+    obj = read_cache_file(
+        decode_cache_filepath,
+        KEEP_INT64_CODEC_OPTIONS if keep_int64 else DECODE_CACHE_CODEC_OPTIONS,
+    )
+
+    if obj is None:
+        return None
+
+    # mtime doubles as last access time for eviction
+    os.utime(decode_cache_filepath)
+
+    return obj
+
+
+def get_decode_cache_entry_lst() -> list[os.DirEntry]:
+    with os.scandir(DECODE_CACHE_DIRPATH) as it:
+        return [i for i in it if i.is_file() and i.name.endswith(DECODE_CACHE_SUFFIX)]
+
+
+# running total of the cache dir size, keyed by its absolute path, so that a
+# write only rescans the dir once the budget is exceeded
+decode_cache_size_dict: dict[str, int] = {}
+
+
+def get_decode_cache_size_key() -> str:
+    return os.path.abspath(DECODE_CACHE_DIRPATH)
+
+
+def evict_decode_cache(max_size: int):
+    entry_lst = get_decode_cache_entry_lst()
+
+    stat_lst = [(i.path, i.stat()) for i in entry_lst]
+
+    total_size = sum(i.st_size for _, i in stat_lst)
+
+    decode_cache_size_dict[get_decode_cache_size_key()] = total_size
+
+    if total_size <= max_size:
+        return
+
+    stat_lst.sort(key=lambda x: x[1].st_mtime)
+
+    for path, st in stat_lst:
+        if total_size <= max_size:
+            break
+
+        Path(path).unlink(missing_ok=True)
+
+        total_size -= st.st_size
+
+    decode_cache_size_dict[get_decode_cache_size_key()] = total_size
+
+
+def save_decode_cache(key: str, obj):
+    cache_bytes = dump_cache_bytes(obj)
+
+    if cache_bytes is None:
+        return
+
+    max_size = get_decode_cache_max_size()
+
+    if len(cache_bytes) > max_size:
+        return
+
+    decode_cache_filepath = get_decode_cache_filepath(key)
+
+    size_key = get_decode_cache_size_key()
+
+    if size_key not in decode_cache_size_dict:
+        decode_cache_filepath.parent.mkdir(parents=True, exist_ok=True)
+        evict_decode_cache(max_size)
+
+    try:
+        prev_size = decode_cache_filepath.stat().st_size
+    except FileNotFoundError:
+        prev_size = 0
+
+    write_cache_file(decode_cache_filepath, cache_bytes)
+
+    decode_cache_size_dict[size_key] += len(cache_bytes) - prev_size
+
+    if decode_cache_size_dict[size_key] > max_size:
+        evict_decode_cache(max_size)
+
+
+def is_manifest_snapshot_enabled() -> bool:
+    return config.get("manifest_snapshot", True)
+
+
+# snapshot_name already carries the res version and the content hash, so a
+# stale snapshot is never looked up again
+def get_manifest_snapshot_filepath(snapshot_name: str) -> Path:
+    return Path(MANIFEST_SNAPSHOT_DIRPATH, f"{snapshot_name}{DECODE_CACHE_SUFFIX}")
+
+
+def load_manifest_snapshot(snapshot_name: str):
+    if not is_manifest_snapshot_enabled():
+        return None
+
+    return read_cache_file(get_manifest_snapshot_filepath(snapshot_name))
+
+
+def save_manifest_snapshot(snapshot_name: str, obj):
+    if not is_manifest_snapshot_enabled():
+        return
+
+    cache_bytes = dump_cache_bytes(obj)
+
+    if cache_bytes is None:
+        return
+
+    write_cache_file(get_manifest_snapshot_filepath(snapshot_name), cache_bytes)
@@ -4,8 +4,18 @@ TMP_DIRPATH = "tmp/"
 
 ASSET_DIRPATH = "asset/"
 
+ASSET_STORE_DIRPATH = "asset_store/"
+
 MOD_DIRPATH = "mod/"
 
+FBS_DIRPATH = "fbs/"
+
+DECODE_CACHE_DIRPATH = "cache/decode/"
+
+ANON_ASSET_INDEX_DIRPATH = "cache/anon_asset_index/"
+
+MANIFEST_SNAPSHOT_DIRPATH = "cache/manifest/"
+
 
 class KnownTable(StrEnum):
     ACTIVITY_TABLE = "activity_table"
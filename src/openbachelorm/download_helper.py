@@ -0,0 +1,204 @@
+import http.client
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+DOWNLOAD_TIMEOUT = 60
+
+DOWNLOAD_MAX_RETRY = 5
+
+DOWNLOAD_RETRY_BACKOFF = 0.5
+
+DOWNLOAD_MAX_REDIRECT = 5
+
+DOWNLOAD_MAX_IDLE_CONN = 16
+
+DOWNLOAD_RETRY_STATUS_SET = {408, 429, 500, 502, 503, 504}
+
+DOWNLOAD_REDIRECT_STATUS_SET = {301, 302, 303, 307, 308}
+
+
+class DownloadError(ConnectionError):
+    pass
+
+
+class DownloadRetryError(ConnectionError):
+    pass
+
+
+@dataclass
+class DownloadStat:
+    file_cnt: int = 0
+    byte_cnt: int = 0
+    elapsed: float = 0
+    retry_cnt: int = 0
+    conn_cnt: int = 0
+
+
+download_stat = DownloadStat()
+download_stat_lock = threading.Lock()
+
+
+def get_download_stat() -> DownloadStat:
+    with download_stat_lock:
+        return DownloadStat(**vars(download_stat))
+
+
+def update_download_stat(**kwargs):
+    with download_stat_lock:
+        for k, v in kwargs.items():
+            setattr(download_stat, k, getattr(download_stat, k) + v)
+
+
+# idle keep-alive connections, keyed by (scheme, netloc)
+idle_conn_dict: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+idle_conn_lock = threading.Lock()
+
+
+def get_conn(scheme: str, netloc: str) -> http.client.HTTPConnection:
+    with idle_conn_lock:
+        idle_conn_lst = idle_conn_dict.get((scheme, netloc))
+
+        if idle_conn_lst:
+            return idle_conn_lst.pop()
+
+    update_download_stat(conn_cnt=1)
+
+    if scheme == "https":
+        return http.client.HTTPSConnection(netloc, timeout=DOWNLOAD_TIMEOUT)
+
+    if scheme == "http":
+        return http.client.HTTPConnection(netloc, timeout=DOWNLOAD_TIMEOUT)
+
+    raise ValueError(f"unsupported scheme {scheme}")
+
+
+def put_conn(scheme: str, netloc: str, conn: http.client.HTTPConnection):
+    with idle_conn_lock:
+        idle_conn_lst = idle_conn_dict.setdefault((scheme, netloc), [])
+
+        if len(idle_conn_lst) < DOWNLOAD_MAX_IDLE_CONN:
+            idle_conn_lst.append(conn)
+            return
+
+    conn.close()
+
+
+def close_idle_conn():
+    with idle_conn_lock:
+        for idle_conn_lst in idle_conn_dict.values():
+            for conn in idle_conn_lst:
+                conn.close()
+
+        idle_conn_dict.clear()
+
+
+def get_request_target(split_url) -> str:
+    target = split_url.path or "/"
+
+    if split_url.query:
+        target += f"?{split_url.query}"
+
+    return target
+
+
+# returns the redirect location as str, or the body size once it is written
+def download_url_once(url: str, filepath: Path) -> str | int:
+    split_url = urlsplit(url)
+
+    conn = get_conn(split_url.scheme, split_url.netloc)
+
+    reusable = False
+
+    try:
+        conn.request(
+            "GET",
+            get_request_target(split_url),
+            headers={"Connection": "keep-alive"},
+        )
+
+        resp = conn.getresponse()
+
+        if resp.status in DOWNLOAD_REDIRECT_STATUS_SET:
+            resp.read()
+            reusable = not resp.will_close
+
+            location = resp.getheader("Location")
+            if not location:
+                raise DownloadError(f"redirect without location from {url}")
+
+            return urljoin(url, location)
+
+        if resp.status in DOWNLOAD_RETRY_STATUS_SET:
+            resp.read()
+            reusable = not resp.will_close
+
+            raise DownloadRetryError(f"status {resp.status} from {url}")
+
+        if resp.status != 200:
+            raise DownloadError(f"status {resp.status} from {url}")
+
+        content_length = resp.getheader("Content-Length")
+
+        size = 0
+
+        with open(filepath, "wb") as f:
+            while chunk := resp.read(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                size += len(chunk)
+
+        if content_length is not None and size != int(content_length):
+            raise DownloadRetryError(f"incomplete body from {url}")
+
+        reusable = not resp.will_close
+
+        update_download_stat(byte_cnt=size)
+
+        return size
+
+    except (DownloadError, DownloadRetryError):
+        raise
+
+    # e.g. a keep-alive connection closed by the server in the meantime
+    except (OSError, http.client.HTTPException) as e:
+        raise DownloadRetryError(f"failed to download {url}: {e}") from e
+
+    finally:
+        if reusable:
+            put_conn(split_url.scheme, split_url.netloc, conn)
+        else:
+            conn.close()
+
+
+def download_url(url: str, filepath: Path) -> int:
+    start = time.perf_counter()
+
+    for retry_idx in range(DOWNLOAD_MAX_RETRY + 1):
+        try:
+            result = url
+
+            for _ in range(DOWNLOAD_MAX_REDIRECT + 1):
+                result = download_url_once(result, filepath)
+
+                if isinstance(result, int):
+                    break
+            else:
+                raise DownloadError(f"too many redirects from {url}")
+
+            break
+
+        except DownloadRetryError:
+            if retry_idx == DOWNLOAD_MAX_RETRY:
+                raise
+
+            update_download_stat(retry_cnt=1)
+
+            time.sleep(DOWNLOAD_RETRY_BACKOFF * 2**retry_idx)
+
+    update_download_stat(file_cnt=1, elapsed=time.perf_counter() - start)
+
+    return result
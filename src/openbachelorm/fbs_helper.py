@@ -0,0 +1,1307 @@
+import hashlib
+import re
+import struct
+from collections.abc import MutableMapping, MutableSequence
+from dataclasses import dataclass, field
+from enum import StrEnum
+from functools import cache
+from pathlib import Path
+
+import flatbuffers
+
+from .const import FBS_DIRPATH
+
+
+class FbsKind(StrEnum):
+    SCALAR = "scalar"
+    STRING = "string"
+    TABLE = "table"
+
+
+@dataclass
+class FbsEnum:
+    name: str
+    underlying_type: str
+
+    value_dict: dict[str, int] = field(default_factory=dict)
+    name_dict: dict[int, str] = field(default_factory=dict)
+
+
+@dataclass
+class FbsField:
+    name: str
+    type_name: str
+    is_vector: bool
+
+    default: str = "0"
+    is_key: bool = False
+    is_deprecated: bool = False
+    field_id: int = -1
+
+    # resolved after the whole schema is parsed
+    voffset: int = 0
+    inline_size: int = 0
+    kind: FbsKind = None
+    scalar_type: str = ""
+    enum: FbsEnum = None
+    table: "FbsTable" = None
+
+
+@dataclass
+class FbsTable:
+    name: str
+
+    field_lst: list[FbsField] = field(default_factory=list)
+    field_dict: dict[str, FbsField] = field(default_factory=dict)
+
+    key_field: FbsField = None
+
+    slot_count: int = 0
+
+
+@dataclass
+class FbsSchema:
+    enum_dict: dict[str, FbsEnum] = field(default_factory=dict)
+    table_dict: dict[str, FbsTable] = field(default_factory=dict)
+
+    root_table: FbsTable = None
+
+
+SCALAR_TYPE_ALIAS_DICT = {
+    "int8": "byte",
+    "uint8": "ubyte",
+    "int16": "short",
+    "uint16": "ushort",
+    "int32": "int",
+    "uint32": "uint",
+    "int64": "long",
+    "uint64": "ulong",
+    "float32": "float",
+    "float64": "double",
+}
+
+SCALAR_FORMAT_DICT = {
+    "bool": "<?",
+    "byte": "<b",
+    "ubyte": "<B",
+    "short": "<h",
+    "ushort": "<H",
+    "int": "<i",
+    "uint": "<I",
+    "long": "<q",
+    "ulong": "<Q",
+    "float": "<f",
+    "double": "<d",
+}
+
+SCALAR_STRUCT_DICT = {k: struct.Struct(v) for k, v in SCALAR_FORMAT_DICT.items()}
+
+UOFFSET_STRUCT = struct.Struct("<I")
+SOFFSET_STRUCT = struct.Struct("<i")
+VOFFSET_STRUCT = struct.Struct("<H")
+
+FBS_TOKEN_PATTERN = re.compile(
+    r"""
+    \s+
+    | //[^\n]*
+    | /\*.*?\*/
+    | (?P<string>"[^"]*")
+    | (?P<number>[-+]?(?:0[xX][0-9a-fA-F]+|[0-9]+(?:\.[0-9]*)?(?:[eE][-+]?[0-9]+)?))
+    | (?P<ident>[A-Za-z_][A-Za-z0-9_.]*)
+    | (?P<punct>[{}\[\]():;,=])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def tokenize_fbs(fbs_str: str) -> list[str]:
+    token_lst: list[str] = []
+
+    pos = 0
+    while pos < len(fbs_str):
+        match = FBS_TOKEN_PATTERN.match(fbs_str, pos)
+        if match is None:
+            raise ValueError(f"unexpected fbs token at {pos}")
+
+        pos = match.end()
+
+        if match.lastgroup is not None:
+            token_lst.append(match.group(match.lastgroup))
+
+    return token_lst
+
+
+class FbsTokenStream:
+    def __init__(self, token_lst: list[str]):
+        self.token_lst = token_lst
+        self.pos = 0
+
+    def peek(self) -> str:
+        if self.pos < len(self.token_lst):
+            return self.token_lst[self.pos]
+        return ""
+
+    def next(self) -> str:
+        token = self.peek()
+        if not token:
+            raise ValueError("unexpected end of fbs")
+        self.pos += 1
+        return token
+
+    def expect(self, token: str):
+        actual = self.next()
+        if actual != token:
+            raise ValueError(f"expected {token} in fbs, got {actual}")
+
+    def accept(self, token: str) -> bool:
+        if self.peek() == token:
+            self.pos += 1
+            return True
+        return False
+
+
+def parse_fbs_attribute_dict(stream: FbsTokenStream) -> dict[str, str]:
+    attribute_dict: dict[str, str] = {}
+
+    if not stream.accept("("):
+        return attribute_dict
+
+    while not stream.accept(")"):
+        attribute_name = stream.next()
+        attribute_value = ""
+
+        if stream.accept(":"):
+            attribute_value = stream.next()
+
+        attribute_dict[attribute_name] = attribute_value
+
+        stream.accept(",")
+
+    return attribute_dict
+
+
+def parse_fbs_enum(stream: FbsTokenStream, schema: FbsSchema):
+    enum_name = stream.next()
+
+    underlying_type = "int"
+    if stream.accept(":"):
+        underlying_type = stream.next()
+
+    parse_fbs_attribute_dict(stream)
+
+    fbs_enum = FbsEnum(
+        name=enum_name,
+        underlying_type=SCALAR_TYPE_ALIAS_DICT.get(underlying_type, underlying_type),
+    )
+
+    stream.expect("{")
+
+    value = 0
+    while not stream.accept("}"):
+        value_name = stream.next()
+
+        if stream.accept("="):
+            value = int(stream.next(), 0)
+
+        fbs_enum.value_dict[value_name] = value
+
+        # flatc prints the alphabetically first name among aliased values
+        if value not in fbs_enum.name_dict or value_name < fbs_enum.name_dict[value]:
+            fbs_enum.name_dict[value] = value_name
+
+        value += 1
+
+        stream.accept(",")
+
+    schema.enum_dict[enum_name] = fbs_enum
+
+
+def parse_fbs_table(stream: FbsTokenStream, schema: FbsSchema):
+    table_name = stream.next()
+
+    parse_fbs_attribute_dict(stream)
+
+    fbs_table = FbsTable(name=table_name)
+
+    stream.expect("{")
+
+    while not stream.accept("}"):
+        field_name = stream.next()
+
+        stream.expect(":")
+
+        if stream.accept("["):
+            type_name = stream.next()
+            stream.expect("]")
+            is_vector = True
+        else:
+            type_name = stream.next()
+            is_vector = False
+
+        default = "0"
+        if stream.accept("="):
+            default = stream.next()
+
+        attribute_dict = parse_fbs_attribute_dict(stream)
+
+        stream.expect(";")
+
+        fbs_field = FbsField(
+            name=field_name,
+            type_name=SCALAR_TYPE_ALIAS_DICT.get(type_name, type_name),
+            is_vector=is_vector,
+            default=default,
+            is_key="key" in attribute_dict,
+            is_deprecated="deprecated" in attribute_dict,
+            field_id=int(attribute_dict.get("id", "-1")),
+        )
+
+        fbs_table.field_lst.append(fbs_field)
+        fbs_table.field_dict[field_name] = fbs_field
+
+        if fbs_field.is_key:
+            fbs_table.key_field = fbs_field
+
+    schema.table_dict[table_name] = fbs_table
+
+
+def get_fbs_scalar_default(fbs_field: FbsField):
+    default = fbs_field.default
+
+    if fbs_field.scalar_type == "bool":
+        return default == "true" or (default not in ("false", "0") and bool(default))
+
+    if fbs_field.enum is not None and default in fbs_field.enum.value_dict:
+        return fbs_field.enum.value_dict[default]
+
+    if fbs_field.scalar_type in ("float", "double"):
+        return float(default)
+
+    return int(default, 0)
+
+
+def resolve_fbs_field(fbs_field: FbsField, schema: FbsSchema):
+    type_name = fbs_field.type_name
+
+    if type_name == "string":
+        fbs_field.kind = FbsKind.STRING
+
+    elif type_name in SCALAR_FORMAT_DICT:
+        fbs_field.kind = FbsKind.SCALAR
+        fbs_field.scalar_type = type_name
+
+    elif type_name in schema.enum_dict:
+        fbs_field.kind = FbsKind.SCALAR
+        fbs_field.enum = schema.enum_dict[type_name]
+        fbs_field.scalar_type = fbs_field.enum.underlying_type
+
+    elif type_name in schema.table_dict:
+        fbs_field.kind = FbsKind.TABLE
+        fbs_field.table = schema.table_dict[type_name]
+
+    else:
+        raise ValueError(f"unknown fbs type {type_name}")
+
+    if fbs_field.kind == FbsKind.SCALAR:
+        fbs_field.default = get_fbs_scalar_default(fbs_field)
+
+    if fbs_field.kind == FbsKind.SCALAR and not fbs_field.is_vector:
+        fbs_field.inline_size = SCALAR_STRUCT_DICT[fbs_field.scalar_type].size
+    else:
+        fbs_field.inline_size = UOFFSET_STRUCT.size
+
+
+def resolve_fbs_schema(schema: FbsSchema):
+    for fbs_table in schema.table_dict.values():
+        for i, fbs_field in enumerate(fbs_table.field_lst):
+            if fbs_field.field_id < 0:
+                fbs_field.field_id = i
+
+            fbs_field.voffset = 4 + 2 * fbs_field.field_id
+
+            resolve_fbs_field(fbs_field, schema)
+
+            fbs_table.slot_count = max(fbs_table.slot_count, fbs_field.field_id + 1)
+
+
+def parse_fbs(fbs_str: str) -> FbsSchema:
+    schema = FbsSchema()
+
+    root_type = ""
+
+    stream = FbsTokenStream(tokenize_fbs(fbs_str))
+
+    while stream.peek():
+        keyword = stream.next()
+
+        match keyword:
+            case "enum":
+                parse_fbs_enum(stream, schema)
+
+            case "table":
+                parse_fbs_table(stream, schema)
+
+            case "root_type":
+                root_type = stream.next()
+                stream.expect(";")
+
+            case (
+                "namespace"
+                | "include"
+                | "attribute"
+                | "file_identifier"
+                | "file_extension"
+            ):
+                while stream.next() != ";":
+                    pass
+
+            case _:
+                raise ValueError(f"unsupported fbs declaration {keyword}")
+
+    resolve_fbs_schema(schema)
+
+    if root_type not in schema.table_dict:
+        raise ValueError(f"root_type {root_type} not found")
+
+    schema.root_table = schema.table_dict[root_type]
+
+    return schema
+
+
+def get_fbs_filepath(client_version: str, fbs_name: str) -> Path:
+    return Path(
+        FBS_DIRPATH,
+        client_version,
+        f"{fbs_name}.fbs",
+    )
+
+
+# many client versions ship token-identical schemas, they share one hash
+@cache
+def get_fbs_schema_hash(client_version: str, fbs_name: str) -> str:
+    fbs_filepath = get_fbs_filepath(client_version, fbs_name)
+
+    token_lst = tokenize_fbs(fbs_filepath.read_text("utf-8"))
+
+    return hashlib.sha256("\0".join(token_lst).encode("utf-8")).hexdigest()
+
+
+fbs_schema_dict: dict[str, FbsSchema] = {}
+
+
+@cache
+def load_fbs_schema(client_version: str, fbs_name: str) -> FbsSchema:
+    schema_hash = get_fbs_schema_hash(client_version, fbs_name)
+
+    if schema_hash not in fbs_schema_dict:
+        fbs_filepath = get_fbs_filepath(client_version, fbs_name)
+
+        fbs_schema_dict[schema_hash] = parse_fbs(fbs_filepath.read_text("utf-8"))
+
+    return fbs_schema_dict[schema_hash]
+
+
+@dataclass
+class FbsTableDiff:
+    added_field_lst: list[FbsField] = field(default_factory=list)
+    removed_field_lst: list[FbsField] = field(default_factory=list)
+    changed_field_lst: list[tuple[FbsField, FbsField]] = field(default_factory=list)
+
+
+def is_fbs_enum_compatible(src_enum: FbsEnum, dst_enum: FbsEnum) -> bool:
+    if src_enum is None or dst_enum is None:
+        return src_enum is None and dst_enum is None
+
+    if src_enum.underlying_type != dst_enum.underlying_type:
+        return False
+
+    return all(dst_enum.value_dict.get(k) == v for k, v in src_enum.value_dict.items())
+
+
+# changed means an old binary no longer reads the same under the new field
+def is_fbs_field_changed(src_field: FbsField, dst_field: FbsField) -> bool:
+    if (
+        src_field.kind != dst_field.kind
+        or src_field.is_vector != dst_field.is_vector
+        or src_field.field_id != dst_field.field_id
+        or src_field.is_deprecated != dst_field.is_deprecated
+    ):
+        return True
+
+    match dst_field.kind:
+        case FbsKind.SCALAR:
+            return (
+                src_field.scalar_type != dst_field.scalar_type
+                or src_field.default != dst_field.default
+                or not is_fbs_enum_compatible(src_field.enum, dst_field.enum)
+            )
+
+        case FbsKind.TABLE:
+            return src_field.table.name != dst_field.table.name
+
+    return False
+
+
+def diff_fbs_table(src_table: FbsTable, dst_table: FbsTable) -> FbsTableDiff:
+    table_diff = FbsTableDiff()
+
+    for dst_field in dst_table.field_lst:
+        src_field = src_table.field_dict.get(dst_field.name)
+
+        if src_field is None:
+            table_diff.added_field_lst.append(dst_field)
+
+        elif is_fbs_field_changed(src_field, dst_field):
+            table_diff.changed_field_lst.append((src_field, dst_field))
+
+    for src_field in src_table.field_lst:
+        if src_field.name not in dst_table.field_dict:
+            table_diff.removed_field_lst.append(src_field)
+
+    return table_diff
+
+
+# mirror flatc text output, which prints float with 6 digits and double with 12
+def round_float_like_flatc(value: float, scalar_type: str) -> float:
+    if scalar_type == "float":
+        return float(f"{value:.6f}")
+    return float(f"{value:.12f}")
+
+
+def decode_fbs_scalar(value, fbs_field: FbsField):
+    if fbs_field.enum is not None:
+        return fbs_field.enum.name_dict.get(value, value)
+
+    if fbs_field.scalar_type in ("float", "double"):
+        return round_float_like_flatc(value, fbs_field.scalar_type)
+
+    return value
+
+
+def follow_fbs_offset(buf: bytes, pos: int) -> int:
+    return pos + UOFFSET_STRUCT.unpack_from(buf, pos)[0]
+
+
+def decode_fbs_string(buf: bytes, pos: int) -> str:
+    (str_len,) = UOFFSET_STRUCT.unpack_from(buf, pos)
+    return bytes(buf[pos + 4 : pos + 4 + str_len]).decode("utf-8")
+
+
+def decode_fbs_vector(buf: bytes, pos: int, fbs_field: FbsField) -> list:
+    (vec_len,) = UOFFSET_STRUCT.unpack_from(buf, pos)
+    pos += 4
+
+    match fbs_field.kind:
+        case FbsKind.SCALAR:
+            scalar_struct = SCALAR_STRUCT_DICT[fbs_field.scalar_type]
+            return [
+                decode_fbs_scalar(i, fbs_field)
+                for (i,) in scalar_struct.iter_unpack(
+                    buf[pos : pos + vec_len * scalar_struct.size]
+                )
+            ]
+
+        case FbsKind.STRING:
+            return [
+                decode_fbs_string(buf, follow_fbs_offset(buf, pos + i * 4))
+                for i in range(vec_len)
+            ]
+
+        case _:
+            return [
+                decode_fbs_table(
+                    buf, follow_fbs_offset(buf, pos + i * 4), fbs_field.table
+                )
+                for i in range(vec_len)
+            ]
+
+
+def decode_fbs_table(buf: bytes, pos: int, fbs_table: FbsTable) -> dict:
+    obj = {}
+
+    vtable_pos = pos - SOFFSET_STRUCT.unpack_from(buf, pos)[0]
+    (vtable_size,) = VOFFSET_STRUCT.unpack_from(buf, vtable_pos)
+
+    for fbs_field in fbs_table.field_lst:
+        if fbs_field.is_deprecated:
+            continue
+
+        field_offset = 0
+        if fbs_field.voffset < vtable_size:
+            (field_offset,) = VOFFSET_STRUCT.unpack_from(
+                buf, vtable_pos + fbs_field.voffset
+            )
+
+        if not field_offset:
+            # flatc always prints scalar keys, even when left at default
+            if fbs_field.is_key and fbs_field.kind == FbsKind.SCALAR:
+                obj[fbs_field.name] = decode_fbs_scalar(fbs_field.default, fbs_field)
+            continue
+
+        field_pos = pos + field_offset
+
+        if fbs_field.is_vector:
+            obj[fbs_field.name] = decode_fbs_vector(
+                buf, follow_fbs_offset(buf, field_pos), fbs_field
+            )
+
+        elif fbs_field.kind == FbsKind.SCALAR:
+            (value,) = SCALAR_STRUCT_DICT[fbs_field.scalar_type].unpack_from(
+                buf, field_pos
+            )
+            obj[fbs_field.name] = decode_fbs_scalar(value, fbs_field)
+
+        elif fbs_field.kind == FbsKind.STRING:
+            obj[fbs_field.name] = decode_fbs_string(
+                buf, follow_fbs_offset(buf, field_pos)
+            )
+
+        else:
+            obj[fbs_field.name] = decode_fbs_table(
+                buf, follow_fbs_offset(buf, field_pos), fbs_field.table
+            )
+
+    return obj
+
+
+def decode_fbs(data: bytes, schema: FbsSchema):
+    buf = memoryview(data)
+
+    return decode_fbs_table(buf, follow_fbs_offset(buf, 0), schema.root_table)
+
+
+SCALAR_FLAGS_DICT = {
+    "bool": flatbuffers.number_types.BoolFlags,
+    "byte": flatbuffers.number_types.Int8Flags,
+    "ubyte": flatbuffers.number_types.Uint8Flags,
+    "short": flatbuffers.number_types.Int16Flags,
+    "ushort": flatbuffers.number_types.Uint16Flags,
+    "int": flatbuffers.number_types.Int32Flags,
+    "uint": flatbuffers.number_types.Uint32Flags,
+    "long": flatbuffers.number_types.Int64Flags,
+    "ulong": flatbuffers.number_types.Uint64Flags,
+    "float": flatbuffers.number_types.Float32Flags,
+    "double": flatbuffers.number_types.Float64Flags,
+}
+
+# flatc serializes table fields from the widest to the narrowest
+FBS_FIELD_SIZE_ORDER = (8, 4, 2, 1)
+
+
+def encode_fbs_scalar(value, fbs_field: FbsField):
+    if isinstance(value, str):
+        if fbs_field.enum is not None and value in fbs_field.enum.value_dict:
+            return fbs_field.enum.value_dict[value]
+
+        try:
+            value = float(value) if "." in value else int(value, 0)
+        except ValueError:
+            raise ValueError(f"invalid value {value} for {fbs_field.name}")
+
+    match fbs_field.scalar_type:
+        case "bool":
+            return bool(value)
+
+        case "float":
+            return SCALAR_STRUCT_DICT["float"].unpack(
+                SCALAR_STRUCT_DICT["float"].pack(value)
+            )[0]
+
+        case "double":
+            return float(value)
+
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"non-integer value {value} for {fbs_field.name}")
+
+    return value
+
+
+def get_fbs_key(obj: dict, key_field: FbsField):
+    value = obj.get(key_field.name)
+
+    if value is None:
+        if key_field.kind == FbsKind.STRING:
+            raise ValueError(f"required field is missing: {key_field.name}")
+        return key_field.default
+
+    if key_field.kind == FbsKind.STRING:
+        return value.encode("utf-8")
+
+    return encode_fbs_scalar(value, key_field)
+
+
+# flatc sorts keyed vectors in place with an unstable quicksort, replay it so
+# that duplicate keys end up in the same order as flatc would put them
+def flatc_simple_qsort(item_lst: list):
+    range_lst = [(0, len(item_lst))]
+
+    while range_lst:
+        begin, end = range_lst.pop()
+
+        if end - begin <= 1:
+            continue
+
+        left = begin + 1
+        right = end
+
+        while left < right:
+            if item_lst[begin][0] < item_lst[left][0]:
+                right -= 1
+                item_lst[left], item_lst[right] = item_lst[right], item_lst[left]
+            else:
+                left += 1
+
+        left -= 1
+        item_lst[begin], item_lst[left] = item_lst[left], item_lst[begin]
+
+        range_lst.append((right, end))
+        range_lst.append((begin, left))
+
+
+def sort_fbs_offset_lst_by_key(value: list, offset_lst: list[int], key_field: FbsField):
+    item_lst = [(get_fbs_key(i, key_field), j) for i, j in zip(value, offset_lst)]
+
+    if len({i for i, _ in item_lst}) == len(item_lst):
+        item_lst.sort(key=lambda i: i[0])
+    else:
+        flatc_simple_qsort(item_lst)
+
+    return [j for _, j in item_lst]
+
+
+def encode_fbs_vector(builder: flatbuffers.Builder, value: list, fbs_field: FbsField):
+    if isinstance(value, FbsVectorView):
+        value = materialize_fbs_view(value)
+
+    # flatc does not align the payload of an empty vector, only its length
+    if not value:
+        builder.StartVector(4, 0, 4)
+        return builder.EndVector()
+
+    if fbs_field.kind == FbsKind.SCALAR:
+        flags = SCALAR_FLAGS_DICT[fbs_field.scalar_type]
+
+        builder.StartVector(flags.bytewidth, len(value), flags.bytewidth)
+        for i in reversed(value):
+            builder.Prepend(flags, encode_fbs_scalar(i, fbs_field))
+        return builder.EndVector()
+
+    if fbs_field.kind == FbsKind.STRING:
+        offset_lst = [builder.CreateString(i) for i in value]
+    else:
+        offset_lst = [encode_fbs_table(builder, i, fbs_field.table) for i in value]
+
+        key_field = fbs_field.table.key_field
+        if key_field is not None:
+            offset_lst = sort_fbs_offset_lst_by_key(value, offset_lst, key_field)
+
+    builder.StartVector(4, len(offset_lst), 4)
+    for offset in reversed(offset_lst):
+        builder.PrependUOffsetTRelative(offset)
+    return builder.EndVector()
+
+
+def encode_fbs_table(builder: flatbuffers.Builder, obj: dict, fbs_table: FbsTable):
+    if isinstance(obj, FbsTableView):
+        obj = materialize_fbs_view(obj)
+
+    field_value_lst = []
+
+    for k, v in obj.items():
+        if k not in fbs_table.field_dict:
+            raise ValueError(f"unknown field {k} in {fbs_table.name}")
+
+        fbs_field = fbs_table.field_dict[k]
+
+        if v is None:
+            if fbs_field.kind == FbsKind.SCALAR and not fbs_field.is_vector:
+                raise ValueError(f"null value for scalar field {k}")
+            continue
+
+        if fbs_field.is_vector:
+            v = encode_fbs_vector(builder, v, fbs_field)
+
+        elif fbs_field.kind == FbsKind.SCALAR:
+            v = encode_fbs_scalar(v, fbs_field)
+
+        elif fbs_field.kind == FbsKind.STRING:
+            v = builder.CreateString(v)
+
+        else:
+            v = encode_fbs_table(builder, v, fbs_field.table)
+
+        field_value_lst.append((fbs_field, v))
+
+    return end_fbs_table(builder, field_value_lst, fbs_table)
+
+
+# field_value_lst holds (fbs_field, offset or scalar value), children must
+# already be in the builder
+def end_fbs_table(
+    builder: flatbuffers.Builder, field_value_lst: list, fbs_table: FbsTable
+) -> int:
+    field_value_lst.sort(key=lambda i: i[0].field_id)
+
+    builder.StartObject(fbs_table.slot_count)
+
+    for size in FBS_FIELD_SIZE_ORDER:
+        for fbs_field, v in reversed(field_value_lst):
+            if fbs_field.inline_size != size:
+                continue
+
+            if fbs_field.is_vector or fbs_field.kind != FbsKind.SCALAR:
+                builder.PrependUOffsetTRelativeSlot(fbs_field.field_id, v, 0)
+            else:
+                builder.PrependSlot(
+                    SCALAR_FLAGS_DICT[fbs_field.scalar_type],
+                    fbs_field.field_id,
+                    v,
+                    fbs_field.default,
+                )
+
+    return builder.EndObject()
+
+
+def encode_fbs(obj: dict, schema: FbsSchema) -> bytes:
+    builder = flatbuffers.Builder()
+
+    builder.Finish(encode_fbs_table(builder, obj, schema.root_table))
+
+    return bytes(builder.Output())
+
+
+# lazy, mutable views over a flatbuffer, so that a mod can change a few
+# fields of a big table without decoding all of it
+UNDECODED = object()
+
+
+def decode_fbs_field(buf: bytes, field_pos: int, fbs_field: FbsField):
+    if fbs_field.is_vector:
+        return FbsVectorView(buf, follow_fbs_offset(buf, field_pos), fbs_field)
+
+    match fbs_field.kind:
+        case FbsKind.SCALAR:
+            (value,) = SCALAR_STRUCT_DICT[fbs_field.scalar_type].unpack_from(
+                buf, field_pos
+            )
+            return decode_fbs_scalar(value, fbs_field)
+
+        case FbsKind.STRING:
+            return decode_fbs_string(buf, follow_fbs_offset(buf, field_pos))
+
+    return FbsTableView(buf, follow_fbs_offset(buf, field_pos), fbs_field.table)
+
+
+def decode_fbs_vector_item(buf: bytes, item_pos: int, fbs_field: FbsField):
+    match fbs_field.kind:
+        case FbsKind.SCALAR:
+            (value,) = SCALAR_STRUCT_DICT[fbs_field.scalar_type].unpack_from(
+                buf, item_pos
+            )
+            return decode_fbs_scalar(value, fbs_field)
+
+        case FbsKind.STRING:
+            return decode_fbs_string(buf, follow_fbs_offset(buf, item_pos))
+
+    return FbsTableView(buf, follow_fbs_offset(buf, item_pos), fbs_field.table)
+
+
+class FbsTableView(MutableMapping):
+    def __init__(self, buf: bytes, pos: int, fbs_table: FbsTable):
+        self.buf = buf
+        self.pos = pos
+        self.fbs_table = fbs_table
+
+        self.value_dict = {}
+        self.assigned_set: set[str] = set()
+        self.deleted_set: set[str] = set()
+        self.modified = False
+
+        self.field_pos_dict = None
+
+    def get_field_pos_dict(self) -> dict[str, int]:
+        if self.field_pos_dict is not None:
+            return self.field_pos_dict
+
+        self.field_pos_dict = {}
+
+        buf = self.buf
+
+        vtable_pos = self.pos - SOFFSET_STRUCT.unpack_from(buf, self.pos)[0]
+        (vtable_size,) = VOFFSET_STRUCT.unpack_from(buf, vtable_pos)
+
+        for fbs_field in self.fbs_table.field_lst:
+            if fbs_field.is_deprecated or fbs_field.voffset >= vtable_size:
+                continue
+
+            (field_offset,) = VOFFSET_STRUCT.unpack_from(
+                buf, vtable_pos + fbs_field.voffset
+            )
+
+            if field_offset:
+                self.field_pos_dict[fbs_field.name] = self.pos + field_offset
+
+        return self.field_pos_dict
+
+    def is_present(self, k) -> bool:
+        if k in self.deleted_set:
+            return False
+
+        if k in self.value_dict or k in self.get_field_pos_dict():
+            return True
+
+        key_field = self.fbs_table.key_field
+
+        # flatc always prints scalar keys, even when left at default
+        return (
+            key_field is not None
+            and key_field.name == k
+            and key_field.kind == FbsKind.SCALAR
+        )
+
+    def __getitem__(self, k):
+        if k in self.value_dict:
+            return self.value_dict[k]
+
+        if not self.is_present(k):
+            raise KeyError(k)
+
+        fbs_field = self.fbs_table.field_dict[k]
+
+        field_pos = self.get_field_pos_dict().get(k)
+
+        if field_pos is None:
+            value = decode_fbs_scalar(fbs_field.default, fbs_field)
+        else:
+            value = decode_fbs_field(self.buf, field_pos, fbs_field)
+
+        self.value_dict[k] = value
+
+        return value
+
+    def __setitem__(self, k, v):
+        self.value_dict[k] = v
+        self.assigned_set.add(k)
+        self.deleted_set.discard(k)
+        self.modified = True
+
+    def __delitem__(self, k):
+        if not self.is_present(k):
+            raise KeyError(k)
+
+        self.value_dict.pop(k, None)
+        self.assigned_set.discard(k)
+        self.deleted_set.add(k)
+        self.modified = True
+
+    def __iter__(self):
+        for fbs_field in self.fbs_table.field_lst:
+            if not fbs_field.is_deprecated and self.is_present(fbs_field.name):
+                yield fbs_field.name
+
+        for k in list(self.value_dict):
+            if k not in self.fbs_table.field_dict:
+                yield k
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"FbsTableView({self.fbs_table.name}, {self.pos})"
+
+
+class FbsVectorView(MutableSequence):
+    def __init__(self, buf: bytes, pos: int, fbs_field: FbsField):
+        self.buf = buf
+        self.pos = pos
+        self.fbs_field = fbs_field
+
+        (vec_len,) = UOFFSET_STRUCT.unpack_from(buf, pos)
+
+        if fbs_field.kind == FbsKind.SCALAR:
+            self.item_size = SCALAR_STRUCT_DICT[fbs_field.scalar_type].size
+        else:
+            self.item_size = UOFFSET_STRUCT.size
+
+        # an old index is the position in the original vector, -1 for new items
+        self.item_lst = [UNDECODED] * vec_len
+        self.old_index_lst = list(range(vec_len))
+
+        self.modified = False
+
+        # set once items are inserted or removed, positions no longer match
+        # the original vector
+        self.resized = False
+
+    def get_item_pos(self, old_index: int) -> int:
+        return self.pos + UOFFSET_STRUCT.size + old_index * self.item_size
+
+    def get_item(self, i: int):
+        item = self.item_lst[i]
+
+        if item is UNDECODED:
+            item = decode_fbs_vector_item(
+                self.buf, self.get_item_pos(self.old_index_lst[i]), self.fbs_field
+            )
+
+            self.item_lst[i] = item
+
+        return item
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.get_item(j) for j in range(len(self))[i]]
+
+        return self.get_item(range(len(self))[i])
+
+    def __setitem__(self, i, v):
+        if isinstance(i, slice):
+            v = list(v)
+            self.item_lst[i] = v
+            self.old_index_lst[i] = [-1] * len(v)
+            self.resized = True
+        else:
+            self.item_lst[i] = v
+            self.old_index_lst[i] = -1
+
+        self.modified = True
+
+    def __delitem__(self, i):
+        del self.item_lst[i]
+        del self.old_index_lst[i]
+
+        self.modified = True
+        self.resized = True
+
+    def insert(self, i, v):
+        self.item_lst.insert(i, v)
+        self.old_index_lst.insert(i, -1)
+
+        self.modified = True
+        self.resized = True
+
+    def __len__(self):
+        return len(self.item_lst)
+
+    def __repr__(self):
+        return f"FbsVectorView({self.fbs_field.name}, {len(self)})"
+
+
+def is_fbs_view_dirty(value) -> bool:
+    if isinstance(value, FbsTableView):
+        return value.modified or any(
+            is_fbs_view_dirty(i) for i in value.value_dict.values()
+        )
+
+    if isinstance(value, FbsVectorView):
+        return value.modified or any(is_fbs_view_dirty(i) for i in value.item_lst)
+
+    return False
+
+
+def materialize_fbs_view(value):
+    if isinstance(value, FbsTableView):
+        if not is_fbs_view_dirty(value):
+            return decode_fbs_table(value.buf, value.pos, value.fbs_table)
+
+        return {k: materialize_fbs_view(v) for k, v in value.items()}
+
+    if isinstance(value, FbsVectorView):
+        if not is_fbs_view_dirty(value):
+            return decode_fbs_vector(value.buf, value.pos, value.fbs_field)
+
+        return [materialize_fbs_view(i) for i in value]
+
+    if isinstance(value, list):
+        return [materialize_fbs_view(i) for i in value]
+
+    if isinstance(value, dict):
+        return {k: materialize_fbs_view(v) for k, v in value.items()}
+
+    return value
+
+
+def decode_fbs_view(data: bytes, schema: FbsSchema) -> FbsTableView:
+    buf = bytes(data)
+
+    return FbsTableView(buf, follow_fbs_offset(buf, 0), schema.root_table)
+
+
+# the original buffer is kept as the tail of the new one, flatbuffers offsets
+# only point forward, so rebuilt tables in front can still refer to every
+# untouched string, vector and table in it
+def get_fbs_base_offset(buf: bytes, pos: int) -> int:
+    return len(buf) - pos
+
+
+def encode_fbs_vector_view(
+    builder: flatbuffers.Builder, value: FbsVectorView, buf: bytes
+) -> int:
+    if value.buf is not buf:
+        return encode_fbs_vector(builder, value, value.fbs_field)
+
+    if not is_fbs_view_dirty(value):
+        return get_fbs_base_offset(buf, value.pos)
+
+    fbs_field = value.fbs_field
+
+    if fbs_field.kind == FbsKind.SCALAR:
+        return encode_fbs_vector(builder, list(value), fbs_field)
+
+    offset_lst = []
+
+    for item, old_index in zip(value.item_lst, value.old_index_lst):
+        if old_index >= 0 and (item is UNDECODED or not is_fbs_view_dirty(item)):
+            offset_lst.append(
+                get_fbs_base_offset(
+                    buf, follow_fbs_offset(buf, value.get_item_pos(old_index))
+                )
+            )
+
+        elif fbs_field.kind == FbsKind.STRING:
+            offset_lst.append(builder.CreateString(item))
+
+        elif isinstance(item, FbsTableView):
+            offset_lst.append(encode_fbs_table_view(builder, item, buf))
+
+        else:
+            offset_lst.append(encode_fbs_table(builder, item, fbs_field.table))
+
+    key_field = fbs_field.kind == FbsKind.TABLE and fbs_field.table.key_field
+    if key_field:
+        offset_lst = sort_fbs_offset_lst_by_key(list(value), offset_lst, key_field)
+
+    builder.StartVector(4, len(offset_lst), 4)
+    for offset in reversed(offset_lst):
+        builder.PrependUOffsetTRelative(offset)
+    return builder.EndVector()
+
+
+def encode_fbs_table_view(
+    builder: flatbuffers.Builder, value: FbsTableView, buf: bytes
+) -> int:
+    if value.buf is not buf:
+        return encode_fbs_table(builder, value, value.fbs_table)
+
+    if not is_fbs_view_dirty(value):
+        return get_fbs_base_offset(buf, value.pos)
+
+    fbs_table = value.fbs_table
+    field_pos_dict = value.get_field_pos_dict()
+
+    field_value_lst = []
+
+    for k in value:
+        if k not in fbs_table.field_dict:
+            raise ValueError(f"unknown field {k} in {fbs_table.name}")
+
+        fbs_field = fbs_table.field_dict[k]
+
+        if k not in value.value_dict:
+            if k not in field_pos_dict:
+                continue
+
+            field_pos = field_pos_dict[k]
+
+            if fbs_field.kind == FbsKind.SCALAR and not fbs_field.is_vector:
+                (v,) = SCALAR_STRUCT_DICT[fbs_field.scalar_type].unpack_from(
+                    buf, field_pos
+                )
+            else:
+                v = get_fbs_base_offset(buf, follow_fbs_offset(buf, field_pos))
+
+            field_value_lst.append((fbs_field, v))
+            continue
+
+        v = value.value_dict[k]
+
+        if v is None:
+            if fbs_field.kind == FbsKind.SCALAR and not fbs_field.is_vector:
+                raise ValueError(f"null value for scalar field {k}")
+            continue
+
+        if isinstance(v, FbsVectorView):
+            v = encode_fbs_vector_view(builder, v, buf)
+
+        elif isinstance(v, FbsTableView):
+            v = encode_fbs_table_view(builder, v, buf)
+
+        elif fbs_field.is_vector:
+            v = encode_fbs_vector(builder, v, fbs_field)
+
+        elif fbs_field.kind == FbsKind.SCALAR:
+            v = encode_fbs_scalar(v, fbs_field)
+
+        elif fbs_field.kind == FbsKind.STRING:
+            v = builder.CreateString(v)
+
+        else:
+            v = encode_fbs_table(builder, v, fbs_field.table)
+
+        field_value_lst.append((fbs_field, v))
+
+    return end_fbs_table(builder, field_value_lst, fbs_table)
+
+
+# patch_lst holds (pos, struct, value), returns False as soon as a change
+# cannot be written over the existing bytes
+def collect_fbs_view_patch(value, buf: bytes, patch_lst: list) -> bool:
+    if value.buf is not buf:
+        return False
+
+    if isinstance(value, FbsVectorView):
+        if value.resized:
+            return False
+
+        fbs_field = value.fbs_field
+
+        for i, (item, old_index) in enumerate(zip(value.item_lst, value.old_index_lst)):
+            if old_index < 0:
+                if fbs_field.kind != FbsKind.SCALAR:
+                    return False
+
+                patch_lst.append(
+                    (
+                        value.get_item_pos(i),
+                        SCALAR_STRUCT_DICT[fbs_field.scalar_type],
+                        encode_fbs_scalar(item, fbs_field),
+                    )
+                )
+
+            elif isinstance(item, (FbsTableView, FbsVectorView)):
+                if not collect_fbs_view_patch(item, buf, patch_lst):
+                    return False
+
+        return True
+
+    if value.deleted_set:
+        return False
+
+    field_pos_dict = value.get_field_pos_dict()
+
+    for k, v in value.value_dict.items():
+        if k not in value.assigned_set:
+            is_view = isinstance(v, (FbsTableView, FbsVectorView))
+
+            if is_view and not collect_fbs_view_patch(v, buf, patch_lst):
+                return False
+            continue
+
+        fbs_field = value.fbs_table.field_dict.get(k)
+
+        # an absent field has no bytes to overwrite, a key change would need
+        # the parent vector sorted again
+        if (
+            fbs_field is None
+            or fbs_field.is_vector
+            or fbs_field.kind != FbsKind.SCALAR
+            or fbs_field.is_key
+            or k not in field_pos_dict
+            or v is None
+        ):
+            return False
+
+        v = encode_fbs_scalar(v, fbs_field)
+
+        # a re-encode would leave a default value out of the table
+        if v == encode_fbs_scalar(fbs_field.default, fbs_field):
+            return False
+
+        patch_lst.append(
+            (field_pos_dict[k], SCALAR_STRUCT_DICT[fbs_field.scalar_type], v)
+        )
+
+    return True
+
+
+def encode_fbs_view(value: FbsTableView, schema: FbsSchema) -> bytes:
+    if not isinstance(value, FbsTableView):
+        return encode_fbs(value, schema)
+
+    buf = value.buf
+
+    if not is_fbs_view_dirty(value):
+        return buf
+
+    patch_lst = []
+
+    if collect_fbs_view_patch(value, buf, patch_lst):
+        patched_buf = bytearray(buf)
+
+        for pos, scalar_struct, v in patch_lst:
+            scalar_struct.pack_into(patched_buf, pos, v)
+
+        return bytes(patched_buf)
+
+    builder = flatbuffers.Builder(len(buf))
+
+    builder.head = 0
+    builder.Bytes[:] = buf
+
+    # keep the 8 byte scalars of the old buffer aligned
+    builder.minalign = 8
+
+    builder.Finish(encode_fbs_table_view(builder, value, buf))
+
+    return bytes(builder.Output())
+
+
+def find_fbs_vector_item_by_key(value: FbsVectorView, k):
+    key_field = value.fbs_field.table.key_field
+
+    key = get_fbs_key({key_field.name: k}, key_field)
+
+    # untouched keyed vectors are still sorted the way flatc wrote them
+    if not value.modified:
+        lo = 0
+        hi = len(value)
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+
+            mid_key = get_fbs_key(value[mid], key_field)
+
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                return value[mid]
+
+        raise KeyError(k)
+
+    for item in value:
+        if get_fbs_key(item, key_field) == key:
+            return item
+
+    raise KeyError(k)
+
+
+def get_fbs_view_item(value, k):
+    # a str path element looks up a keyed vector, an int one indexes it
+    if (
+        isinstance(value, FbsVectorView)
+        and isinstance(k, str)
+        and value.fbs_field.kind == FbsKind.TABLE
+        and value.fbs_field.table.key_field is not None
+    ):
+        return find_fbs_vector_item_by_key(value, k)
+
+    return value[k]
+
+
+def get_fbs_view_by_path(value, path: list):
+    for k in path:
+        value = get_fbs_view_item(value, k)
+
+    return value
+
+
+def set_fbs_view_by_path(value, path: list, v):
+    if not path:
+        raise ValueError("empty path")
+
+    for k in path[:-1]:
+        value = get_fbs_view_item(value, k)
+
+    value[path[-1]] = v
@@ -1,9 +1,16 @@
+import os
 import subprocess
+import sys
+import struct
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from uuid import uuid4
 from zipfile import ZipFile
 import json
-from functools import wraps
+from functools import partial, wraps
+from dataclasses import dataclass, field
 import zipfile
 from zipfile import ZipFile
 
@@ -12,7 +19,24 @@ from Crypto.Util.Padding import pad, unpad
 import bson
 from packaging.version import Version
 
-from .const import TMP_DIRPATH, ASSET_DIRPATH, KnownTable
+from .const import TMP_DIRPATH, ASSET_DIRPATH, ASSET_STORE_DIRPATH, KnownTable
+from .config import config
+from .fbs_helper import (
+    get_fbs_filepath,
+    load_fbs_schema,
+    get_fbs_schema_hash,
+    decode_fbs,
+    encode_fbs,
+    decode_fbs_view,
+    encode_fbs_view,
+)
+from .download_helper import download_url
+from .cache_helper import (
+    is_decode_cache_enabled,
+    get_decode_cache_key,
+    load_decode_cache,
+    save_decode_cache,
+)
 
 
 ORIG_ASSET_URL_PREFIX = "https://ak.hycdn.cn/assetbundle/official"
@@ -38,6 +62,22 @@ def get_tmp_filepath():
     return tmp_filepath
 
 
+def download_file_aria2c(url: str, tmp_filepath: Path):
+    proc = subprocess.run(
+        [
+            "aria2c",
+            "-q",
+            "-o",
+            tmp_filepath.as_posix(),
+            "--auto-file-renaming=false",
+            url,
+        ]
+    )
+
+    if proc.returncode:
+        raise ConnectionError(f"download_file failed to download {url}")
+
+
 def download_file(url: str, filepath: Path):
     print(f"info: downloading {url}")
 
@@ -46,23 +86,23 @@ def download_file(url: str, filepath: Path):
     tmp_filepath = get_tmp_filepath()
 
     try:
-        proc = subprocess.run(
-            [
-                "aria2c",
-                "-q",
-                "-o",
-                tmp_filepath.as_posix(),
-                "--auto-file-renaming=false",
-                url,
-            ]
-        )
+        start = time.perf_counter()
 
-        if proc.returncode:
-            raise ConnectionError(f"download_file failed to download {url}")
+        if config.get("download_aria2c", False):
+            download_file_aria2c(url, tmp_filepath)
+        else:
+            download_url(url, tmp_filepath)
+
+        elapsed = time.perf_counter() - start
+
+        size = tmp_filepath.stat().st_size
 
         tmp_filepath.replace(filepath)
 
-        print(f"info: {url} downloaded")
+        print(
+            f"info: {url} downloaded, {size} bytes in {elapsed:.2f}s "
+            f"({size / max(elapsed, 1e-6) / 1024 / 1024:.2f} MiB/s)"
+        )
 
     finally:
         remove_aria2_tmp(tmp_filepath)
@@ -84,8 +124,117 @@ def get_asset_filepath(res_version: str, asset_rel_filepath_str: str):
     return Path(ASSET_DIRPATH) / res_version / asset_rel_filepath_str
 
 
+def get_asset_dat_filepath(res_version: str, asset_rel_filepath_str: str):
+    return get_asset_filepath(res_version, asset_rel_filepath_str).with_suffix(".dat")
+
+
+def is_asset_dat_kept() -> bool:
+    return config.get("keep_asset_dat", False)
+
+
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+
+
+def extract_asset_dat(asset_dat_filepath: Path, member_name: str, filepath: Path):
+    with ZipFile(asset_dat_filepath) as zf:
+        member_info = zf.getinfo(member_name)
+
+        # the member is streamed in chunks, zipfile checks its crc32 once the
+        # last chunk is read
+        with zf.open(member_info) as src_f, open(filepath, "wb") as dst_f:
+            shutil.copyfileobj(src_f, dst_f, EXTRACT_CHUNK_SIZE)
+
+            size = dst_f.tell()
+
+    if size != member_info.file_size:
+        raise ValueError(f"size mismatch when extracting {member_name}")
+
+
+def is_asset_store_enabled() -> bool:
+    return config.get("asset_store", True)
+
+
+def get_asset_store_filepath(ab_hash: str) -> Path | None:
+    # the hash doubles as a filename, so only accept plain ascii alnum
+    if not ab_hash or not ab_hash.isascii() or not ab_hash.isalnum():
+        return None
+
+    return Path(ASSET_STORE_DIRPATH, ab_hash[:2], ab_hash)
+
+
+# linux FICLONE ioctl, shares the extents on btrfs / xfs until either side
+# is written
+FICLONE = 0x40049409
+
+
+def clone_file_content(src_filepath: Path, dst_filepath: Path):
+    if sys.platform == "linux":
+        import fcntl
+
+        with open(src_filepath, "rb") as src_f, open(dst_filepath, "wb") as dst_f:
+            try:
+                fcntl.ioctl(dst_f.fileno(), FICLONE, src_f.fileno())
+                return
+            except OSError:
+                pass
+
+    shutil.copyfile(src_filepath, dst_filepath)
+
+
+def link_file(src_filepath: Path, dst_filepath: Path):
+    dst_filepath.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_filepath = get_tmp_filepath()
+
+    try:
+        try:
+            os.link(src_filepath, tmp_filepath)
+        except OSError:
+            # e.g. no hardlink support, fall back to a reflink or a plain copy
+            clone_file_content(src_filepath, tmp_filepath)
+
+        tmp_filepath.replace(dst_filepath)
+
+    finally:
+        tmp_filepath.unlink(missing_ok=True)
+
+
+# gives filepath an inode of its own, so that it can be written in place
+# without touching the files it was linked from
+def unlink_file(filepath: Path):
+    if filepath.stat().st_nlink <= 1:
+        return
+
+    tmp_filepath = get_tmp_filepath()
+
+    try:
+        clone_file_content(filepath, tmp_filepath)
+
+        tmp_filepath.replace(filepath)
+
+    finally:
+        tmp_filepath.unlink(missing_ok=True)
+
+
+def write_file_atomic(filepath: Path, content: bytes):
+    tmp_filepath = get_tmp_filepath()
+
+    try:
+        tmp_filepath.write_bytes(content)
+
+        tmp_filepath.replace(filepath)
+
+    finally:
+        tmp_filepath.unlink(missing_ok=True)
+
+
+# ab_hash is the bundle hash listed in abInfos, identical bundles across
+# res versions share a single file in the asset store
 def download_asset(
-    res_version: str, asset_rel_filepath_str: str, platform_name: str
+    res_version: str,
+    asset_rel_filepath_str: str,
+    platform_name: str,
+    ab_hash: str = "",
 ) -> Path:
     asset_rel_filepath = Path(asset_rel_filepath_str)
 
@@ -94,22 +243,80 @@ def download_asset(
     if asset_filepath.is_file():
         return asset_filepath
 
+    asset_store_filepath = None
+
+    if is_asset_store_enabled():
+        asset_store_filepath = get_asset_store_filepath(ab_hash)
+
+    if asset_store_filepath is not None and asset_store_filepath.is_file():
+        link_file(asset_store_filepath, asset_filepath)
+
+        return asset_filepath
+
     asset_filepath.parent.mkdir(parents=True, exist_ok=True)
 
     asset_dat_url = get_asset_dat_url(res_version, asset_rel_filepath, platform_name)
 
-    asset_dat_filepath = asset_filepath.with_suffix(".dat")
+    # both tmp files are private to this call, so concurrent downloads of the
+    # same asset never see a partial file
+    asset_dat_filepath = get_tmp_filepath().with_suffix(".dat")
+    asset_tmp_filepath = get_tmp_filepath()
 
-    download_file(asset_dat_url, asset_dat_filepath)
+    try:
+        download_file(asset_dat_url, asset_dat_filepath)
 
-    with ZipFile(asset_dat_filepath) as zf:
-        asset_filepath.write_bytes(zf.read(asset_rel_filepath.as_posix()))
+        extract_asset_dat(
+            asset_dat_filepath, asset_rel_filepath.as_posix(), asset_tmp_filepath
+        )
+
+        asset_tmp_filepath.replace(asset_filepath)
+
+        # the .dat is already a valid mod file for an unmodified bundle
+        if is_asset_dat_kept():
+            asset_dat_filepath.replace(
+                get_asset_dat_filepath(res_version, asset_rel_filepath_str)
+            )
+
+    finally:
+        asset_dat_filepath.unlink(missing_ok=True)
+        asset_tmp_filepath.unlink(missing_ok=True)
 
-    asset_dat_filepath.unlink(missing_ok=True)
+    if asset_store_filepath is not None:
+        link_file(asset_filepath, asset_store_filepath)
 
     return asset_filepath
 
 
+DEFAULT_DOWNLOAD_MAX_WORKERS = 8
+
+
+def get_download_max_workers() -> int:
+    return config.get("download_max_workers", DEFAULT_DOWNLOAD_MAX_WORKERS)
+
+
+# asset_lst holds (res_version, asset_rel_filepath_str, platform_name, ab_hash)
+def download_asset_many(asset_lst: list[tuple[str, str, str, str]]) -> list[Path]:
+    asset_lst = list(dict.fromkeys(asset_lst))
+
+    pending_asset_lst = [
+        i for i in asset_lst if not get_asset_filepath(i[0], i[1]).is_file()
+    ]
+
+    if pending_asset_lst:
+        ensure_tmp_dir()
+
+        with ThreadPoolExecutor(
+            max_workers=min(get_download_max_workers(), len(pending_asset_lst))
+        ) as executor:
+            for _ in executor.map(
+                lambda i: download_asset(*i),
+                pending_asset_lst,
+            ):
+                pass
+
+    return [get_asset_filepath(i[0], i[1]) for i in asset_lst]
+
+
 HOT_UPDATE_LIST_JSON = "hot_update_list.json"
 
 
@@ -126,6 +333,87 @@ def download_hot_update_list(res_version: str, platform_name: str) -> Path:
     return hot_update_list_filepath
 
 
+@dataclass
+class HotUpdateListDiff:
+    added_lst: list[str] = field(default_factory=list)
+    removed_lst: list[str] = field(default_factory=list)
+    changed_lst: list[str] = field(default_factory=list)
+    unchanged_lst: list[str] = field(default_factory=list)
+
+
+def get_hot_update_list_hash_dict(hot_update_list) -> dict[str, str]:
+    return {
+        ab_info["name"]: ab_info.get("hash", "")
+        for ab_info in hot_update_list["abInfos"]
+    }
+
+
+def diff_hot_update_list(src_hot_update_list, dst_hot_update_list) -> HotUpdateListDiff:
+    src_hash_dict = get_hot_update_list_hash_dict(src_hot_update_list)
+    dst_hash_dict = get_hot_update_list_hash_dict(dst_hot_update_list)
+
+    diff = HotUpdateListDiff()
+
+    for ab_name, ab_hash in dst_hash_dict.items():
+        if ab_name not in src_hash_dict:
+            diff.added_lst.append(ab_name)
+
+        # a bundle without hash can not be proven unchanged
+        elif not ab_hash or ab_hash != src_hash_dict[ab_name]:
+            diff.changed_lst.append(ab_name)
+
+        else:
+            diff.unchanged_lst.append(ab_name)
+
+    for ab_name in src_hash_dict:
+        if ab_name not in dst_hash_dict:
+            diff.removed_lst.append(ab_name)
+
+    return diff
+
+
+# sorted, res versions start with their timestamp
+def get_local_res_version_lst() -> list[str]:
+    asset_dirpath = Path(ASSET_DIRPATH)
+
+    if not asset_dirpath.is_dir():
+        return []
+
+    return sorted(
+        i.name
+        for i in asset_dirpath.iterdir()
+        if Path(i, HOT_UPDATE_LIST_JSON).is_file()
+    )
+
+
+# links the bundles of prev_res_version left unchanged in diff into the asset
+# store, download_asset then serves them instead of downloading them again
+def seed_asset_store(
+    prev_res_version: str, diff: HotUpdateListDiff, ab_hash_dict: dict[str, str]
+) -> int:
+    if not is_asset_store_enabled():
+        return 0
+
+    seeded_cnt = 0
+
+    for ab_name in diff.unchanged_lst:
+        asset_store_filepath = get_asset_store_filepath(ab_hash_dict[ab_name])
+
+        if asset_store_filepath is None or asset_store_filepath.is_file():
+            continue
+
+        prev_asset_filepath = get_asset_filepath(prev_res_version, ab_name)
+
+        if not prev_asset_filepath.is_file():
+            continue
+
+        link_file(prev_asset_filepath, asset_store_filepath)
+
+        seeded_cnt += 1
+
+    return seeded_cnt
+
+
 SURROGATE_ESCAPE = "surrogateescape"
 
 
@@ -164,15 +452,9 @@ def remove_flatc_tmp(tmp_filepath: Path):
     json_tmp_filepath.unlink(missing_ok=True)
 
 
-def get_fbs_filepath(client_version: str, fbs_name: str) -> Path:
-    return Path(
-        "fbs",
-        client_version,
-        f"{fbs_name}.fbs",
-    )
-
-
-def decode_flatc(script_bytes: bytes, client_version: str, fbs_name: str) -> str:
+def decode_flatc_subprocess(
+    script_bytes: bytes, client_version: str, fbs_name: str
+) -> str:
     fbs_filepath = get_fbs_filepath(client_version, fbs_name)
 
     tmp_filepath = get_tmp_filepath()
@@ -208,7 +490,7 @@ def decode_flatc(script_bytes: bytes, client_version: str, fbs_name: str) -> str
         remove_flatc_tmp(tmp_filepath)
 
 
-def encode_flatc(json_str: str, client_version: str, fbs_name: str) -> bytes:
+def encode_flatc_subprocess(json_str: str, client_version: str, fbs_name: str) -> bytes:
     fbs_filepath = get_fbs_filepath(client_version, fbs_name)
 
     tmp_filepath = get_tmp_filepath()
@@ -242,6 +524,233 @@ def encode_flatc(json_str: str, client_version: str, fbs_name: str) -> bytes:
         remove_flatc_tmp(tmp_filepath)
 
 
+FLATC_BATCH_SIZE = 64
+
+
+# flatc reads every binary after -- with the last schema given, so a decode
+# batch can only span one schema
+def group_flatc_req_dict(req_dict: dict) -> dict[tuple[str, str], list]:
+    group_dict: dict[tuple[str, str], list] = {}
+
+    for k, (_, client_version, fbs_name) in req_dict.items():
+        group_dict.setdefault((client_version, fbs_name), []).append(k)
+
+    return group_dict
+
+
+# a json file is encoded with the schema given last before it, so an encode
+# batch can span every schema of a client version, keys of one schema are
+# kept together so that each schema is given once per batch
+def group_flatc_req_dict_by_client_version(req_dict: dict) -> dict[str, list]:
+    group_dict: dict[str, list] = {}
+
+    for (client_version, _), key_lst in group_flatc_req_dict(req_dict).items():
+        group_dict.setdefault(client_version, []).extend(key_lst)
+
+    return group_dict
+
+
+def get_flatc_batch_lst(key_lst: list) -> list[list]:
+    return [
+        key_lst[i : i + FLATC_BATCH_SIZE]
+        for i in range(0, len(key_lst), FLATC_BATCH_SIZE)
+    ]
+
+
+def get_flatc_batch_tmp_dirpath() -> Path:
+    tmp_dirpath = get_tmp_filepath()
+
+    tmp_dirpath.mkdir()
+
+    return tmp_dirpath
+
+
+# a failing batch would otherwise only show up as missing output files
+def run_flatc_batch(arg_lst: list[str], err_msg: str):
+    try:
+        subprocess.run(arg_lst, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        stderr = e.stderr.decode("utf-8", "replace").strip()
+
+        raise ValueError(f"{err_msg}: {stderr}") from e
+
+
+def decode_flatc_batch_subprocess(
+    script_bytes_lst: list[bytes], client_version: str, fbs_name: str
+) -> list[str]:
+    fbs_filepath = get_fbs_filepath(client_version, fbs_name)
+
+    tmp_dirpath = get_flatc_batch_tmp_dirpath()
+
+    try:
+        bin_tmp_filepath_lst = [
+            get_bin_tmp_filepath(tmp_dirpath / str(i))
+            for i in range(len(script_bytes_lst))
+        ]
+
+        for bin_tmp_filepath, script_bytes in zip(
+            bin_tmp_filepath_lst, script_bytes_lst
+        ):
+            bin_tmp_filepath.write_bytes(script_bytes)
+
+        run_flatc_batch(
+            [
+                "flatc",
+                "--strict-json",
+                "--natural-utf8",
+                "--no-warnings",
+                "--json",
+                "--raw-binary",
+                "-o",
+                tmp_dirpath.as_posix(),
+                fbs_filepath.as_posix(),
+                "--",
+                *[i.as_posix() for i in bin_tmp_filepath_lst],
+            ],
+            f"decode_flatc_many failed to decode {fbs_name}",
+        )
+
+        return [
+            get_json_tmp_filepath(i).read_text("utf-8") for i in bin_tmp_filepath_lst
+        ]
+
+    finally:
+        shutil.rmtree(tmp_dirpath, ignore_errors=True)
+
+
+# req_lst holds (json_str, fbs_name), all schemas of client_version go through
+# a single flatc process
+def encode_flatc_batch_subprocess(
+    req_lst: list[tuple[str, str]], client_version: str
+) -> list[bytes]:
+    tmp_dirpath = get_flatc_batch_tmp_dirpath()
+
+    try:
+        json_tmp_filepath_lst = [
+            get_json_tmp_filepath(tmp_dirpath / str(i)) for i in range(len(req_lst))
+        ]
+
+        file_arg_lst = []
+        prev_fbs_name = None
+
+        for json_tmp_filepath, (json_str, fbs_name) in zip(
+            json_tmp_filepath_lst, req_lst
+        ):
+            json_tmp_filepath.write_text(json_str, "utf-8")
+
+            if fbs_name != prev_fbs_name:
+                file_arg_lst.append(
+                    get_fbs_filepath(client_version, fbs_name).as_posix()
+                )
+                prev_fbs_name = fbs_name
+
+            file_arg_lst.append(json_tmp_filepath.as_posix())
+
+        fbs_name_str = ", ".join(dict.fromkeys(i for _, i in req_lst))
+
+        run_flatc_batch(
+            [
+                "flatc",
+                "--strict-json",
+                "--natural-utf8",
+                "--no-warnings",
+                "--binary",
+                "-o",
+                tmp_dirpath.as_posix(),
+                *file_arg_lst,
+            ],
+            f"encode_flatc_many failed to encode {fbs_name_str}",
+        )
+
+        return [get_bin_tmp_filepath(i).read_bytes() for i in json_tmp_filepath_lst]
+
+    finally:
+        shutil.rmtree(tmp_dirpath, ignore_errors=True)
+
+
+def is_flatc_subprocess_enabled() -> bool:
+    return config.get("flatc_subprocess", False)
+
+
+def decode_flatc_obj(script_bytes: bytes, client_version: str, fbs_name: str):
+    if is_flatc_subprocess_enabled():
+        return json.loads(
+            decode_flatc_subprocess(script_bytes, client_version, fbs_name)
+        )
+
+    try:
+        return decode_fbs(script_bytes, load_fbs_schema(client_version, fbs_name))
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"decode_flatc failed to decode {fbs_name}") from e
+
+
+def encode_flatc_obj(obj, client_version: str, fbs_name: str) -> bytes:
+    if is_flatc_subprocess_enabled():
+        return encode_flatc_subprocess(
+            json.dumps(obj, ensure_ascii=False), client_version, fbs_name
+        )
+
+    try:
+        return encode_fbs(obj, load_fbs_schema(client_version, fbs_name))
+    except (struct.error, TypeError, AttributeError) as e:
+        raise ValueError(f"encode_flatc failed to encode {fbs_name}") from e
+
+
+def decode_flatc(script_bytes: bytes, client_version: str, fbs_name: str) -> str:
+    if is_flatc_subprocess_enabled():
+        return decode_flatc_subprocess(script_bytes, client_version, fbs_name)
+
+    return json.dumps(
+        decode_flatc_obj(script_bytes, client_version, fbs_name), ensure_ascii=False
+    )
+
+
+def encode_flatc(json_str: str, client_version: str, fbs_name: str) -> bytes:
+    if is_flatc_subprocess_enabled():
+        return encode_flatc_subprocess(json_str, client_version, fbs_name)
+
+    return encode_flatc_obj(json.loads(json_str), client_version, fbs_name)
+
+
+# req_dict maps any key to (script_bytes, client_version, fbs_name)
+def decode_flatc_many(req_dict: dict) -> dict:
+    if not is_flatc_subprocess_enabled():
+        return {k: decode_flatc(*v) for k, v in req_dict.items()}
+
+    result_dict = {}
+
+    for (client_version, fbs_name), key_lst in group_flatc_req_dict(req_dict).items():
+        for batch_key_lst in get_flatc_batch_lst(key_lst):
+            json_str_lst = decode_flatc_batch_subprocess(
+                [req_dict[k][0] for k in batch_key_lst], client_version, fbs_name
+            )
+
+            result_dict.update(zip(batch_key_lst, json_str_lst))
+
+    return result_dict
+
+
+# req_dict maps any key to (json_str, client_version, fbs_name)
+def encode_flatc_many(req_dict: dict) -> dict:
+    if not is_flatc_subprocess_enabled():
+        return {k: encode_flatc(*v) for k, v in req_dict.items()}
+
+    result_dict = {}
+
+    for client_version, key_lst in group_flatc_req_dict_by_client_version(
+        req_dict
+    ).items():
+        for batch_key_lst in get_flatc_batch_lst(key_lst):
+            script_bytes_lst = encode_flatc_batch_subprocess(
+                [(req_dict[k][0], req_dict[k][2]) for k in batch_key_lst],
+                client_version,
+            )
+
+            result_dict.update(zip(batch_key_lst, script_bytes_lst))
+
+    return result_dict
+
+
 AES_KEY = b"UITpAi82pHAWwnzq"
 
 AES_IV_MASK = b"HRMCwPonJLIB3WCl"
@@ -269,49 +778,86 @@ def encrypt_data(data: bytes) -> bytes:
     return header + cipher.encrypt(pad(data, AES.block_size))
 
 
-def script_decorator(func):
-    @wraps(func)
-    def wrapper(data):
-        return bytes_to_script(func(script_to_bytes(data)))
+# a codec decorator also exposes its decode/encode halves, so that
+# apply_decorator_lst can cache the decode side of a chain
+def codec_decorator(
+    codec_name: str, decode_func, encode_func, cacheable=True, keep_int64=False
+):
+    def _codec_decorator(func):
+        @wraps(func)
+        def wrapper(data):
+            return encode_func(func(decode_func(data)))
 
-    return wrapper
+        return wrapper
 
+    _codec_decorator.codec_name = codec_name
+    _codec_decorator.decode = decode_func
+    _codec_decorator.encode = encode_func
+    _codec_decorator.cacheable = cacheable
+    _codec_decorator.keep_int64 = keep_int64
 
-def header_decorator(func):
-    @wraps(func)
-    def wrapper(data):
-        return add_header(func(remove_header(data)))
+    return _codec_decorator
 
-    return wrapper
+
+script_decorator = codec_decorator("script", script_to_bytes, bytes_to_script)
+
+
+header_decorator = codec_decorator("header", remove_header, add_header)
 
 
 def flatc_decorator(client_version: str, fbs_name: str):
-    def _flatc_decorator(func):
-        @wraps(func)
-        def wrapper(data):
-            return encode_flatc(
-                func(
-                    decode_flatc(
-                        data,
-                        client_version,
-                        fbs_name,
-                    )
-                ),
-                client_version,
-                fbs_name,
-            )
+    _flatc_decorator = codec_decorator(
+        f"flatc:{client_version}:{fbs_name}",
+        partial(decode_flatc, client_version=client_version, fbs_name=fbs_name),
+        partial(encode_flatc, client_version=client_version, fbs_name=fbs_name),
+    )
 
-        return wrapper
+    _flatc_decorator.fbs_key = (client_version, fbs_name)
 
     return _flatc_decorator
 
 
-def json_decorator(func):
-    @wraps(func)
-    def wrapper(data):
-        return json.dumps(func(json.loads(data)), ensure_ascii=False)
+def flatc_json_decorator(client_version: str, fbs_name: str):
+    _flatc_json_decorator = codec_decorator(
+        f"flatc_json:{client_version}:{fbs_name}",
+        partial(decode_flatc_obj, client_version=client_version, fbs_name=fbs_name),
+        partial(encode_flatc_obj, client_version=client_version, fbs_name=fbs_name),
+    )
+
+    # lets apply_decorator_lst_many batch the flatc stage across tables
+    _flatc_json_decorator.flatc_key = (client_version, fbs_name)
+    _flatc_json_decorator.fbs_key = (client_version, fbs_name)
+
+    return _flatc_json_decorator
+
+
+def decode_fbs_view_obj(script_bytes: bytes, client_version: str, fbs_name: str):
+    return decode_fbs_view(script_bytes, load_fbs_schema(client_version, fbs_name))
+
+
+def encode_fbs_view_obj(view, client_version: str, fbs_name: str) -> bytes:
+    try:
+        return encode_fbs_view(view, load_fbs_schema(client_version, fbs_name))
+    except (struct.error, TypeError, AttributeError) as e:
+        raise ValueError(f"encode_fbs_view failed to encode {fbs_name}") from e
+
+
+# hands the mod func a lazy FbsTableView instead of a fully decoded table,
+# untouched parts of the table are carried over without being decoded
+def fbs_view_decorator(client_version: str, fbs_name: str):
+    return codec_decorator(
+        f"fbs_view:{client_version}:{fbs_name}",
+        partial(decode_fbs_view_obj, client_version=client_version, fbs_name=fbs_name),
+        partial(encode_fbs_view_obj, client_version=client_version, fbs_name=fbs_name),
+        cacheable=False,
+    )
 
-    return wrapper
+
+def dump_json(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+json_decorator = codec_decorator("json", json.loads, dump_json)
 
 
 def dump_table(table, dump_filename: str):
@@ -347,20 +893,18 @@ def dump_table_decorator(name: str):
     return _dump_table_decorator
 
 
-def crypt_decorator(func):
-    @wraps(func)
-    def wrapper(data):
-        return encrypt_data(func(decrypt_data(data)))
+crypt_decorator = codec_decorator("crypt", decrypt_data, encrypt_data)
 
-    return wrapper
 
+def decode_utf8(data: bytes) -> str:
+    return data.decode("utf-8")
 
-def encoding_decorator(func):
-    @wraps(func)
-    def wrapper(data):
-        return func(data.decode("utf-8")).encode("utf-8")
 
-    return wrapper
+def encode_utf8(data: str) -> bytes:
+    return data.encode("utf-8")
+
+
+encoding_decorator = codec_decorator("encoding", decode_utf8, encode_utf8)
 
 
 def nop_mod_table_func(table):
@@ -396,12 +940,7 @@ def raw_dump_decorator(name: str):
     return _raw_dump_decorator
 
 
-def bson_decorator(func):
-    @wraps(func)
-    def wrapper(data):
-        return bson.encode(func(bson.decode(data)))
-
-    return wrapper
+bson_decorator = codec_decorator("bson", bson.decode, bson.encode, keep_int64=True)
 
 
 def get_known_table_decorator_lst(
@@ -470,8 +1009,7 @@ def get_known_table_decorator_lst(
             return [
                 script_decorator,
                 header_decorator,
-                flatc_decorator(client_version, table_name.value),
-                json_decorator,
+                flatc_json_decorator(client_version, table_name.value),
                 dump_table_decorator(f"{table_name.value}_{res_version}"),
             ]
 
@@ -520,6 +1058,25 @@ def get_known_table_decorator_lst(
             raise ValueError(f"unsupported table_name {table_name}")
 
 
+# same as get_known_table_decorator_lst, but flatc tables are handed to the
+# mod func as an FbsTableView, no dump is written as that would decode it all
+def get_known_table_view_decorator_lst(
+    table_name: KnownTable, client_version: str, res_version: str
+):
+    decorator_lst = get_known_table_decorator_lst(
+        table_name, client_version, res_version
+    )
+
+    codec_lst, _ = split_decorator_lst_at_codec(decorator_lst)
+
+    pre_codec_lst, flatc_codec, _ = split_codec_lst_at_flatc(codec_lst)
+
+    if flatc_codec is None:
+        return decorator_lst
+
+    return [*pre_codec_lst, fbs_view_decorator(client_version, table_name.value)]
+
+
 def is_known_table_available(table_name: KnownTable, client_version: str):
     match table_name:
         case KnownTable.SANDBOX_TABLE:
@@ -562,16 +1119,20 @@ def write_mod(mod_filepath: str, ab_name: str, content: bytes):
         zf.writestr(ab_name, content)
 
 
+# streams ab_filepath into the zip instead of reading it into memory first
+def write_mod_from_file(mod_filepath: str, ab_name: str, ab_filepath: Path):
+    with ZipFile(mod_filepath, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.write(ab_filepath, ab_name)
+
+
 RESOURCE_MANIFEST = "resource_manifest"
 
 
 def get_manifest(manifest_bytes: bytes, client_version: str):
-    return json.loads(
-        decode_flatc(
-            remove_header(manifest_bytes),
-            client_version,
-            RESOURCE_MANIFEST,
-        )
+    return decode_flatc_obj(
+        remove_header(manifest_bytes),
+        client_version,
+        RESOURCE_MANIFEST,
     )
 
 
@@ -579,16 +1140,15 @@ def get_mod_level_decorator_lst(level_id: str, client_version: str, res_version:
     return [
         script_decorator,
         header_decorator,
-        flatc_decorator(client_version, "prts___levels"),
-        json_decorator,
+        flatc_json_decorator(client_version, "prts___levels"),
         dump_table_decorator(f"{level_id}_{res_version}"),
     ]
 
 
 def get_manifest_bytes(manifest, client_version: str) -> bytes:
     return add_header(
-        encode_flatc(
-            json.dumps(manifest, ensure_ascii=False),
+        encode_flatc_obj(
+            manifest,
             client_version,
             RESOURCE_MANIFEST,
         )
@@ -621,8 +1181,181 @@ def get_known_table_asset_name_prefix(table_name: KnownTable):
             return f"gamedata/excel/{table_name.value}"
 
 
+def split_decorator_lst_at_codec(decorator_lst):
+    for i, decorator in enumerate(decorator_lst):
+        if not hasattr(decorator, "codec_name"):
+            return decorator_lst[:i], decorator_lst[i:]
+
+    return decorator_lst, []
+
+
+def decode_codec_lst(data, codec_lst):
+    for codec in codec_lst:
+        data = codec.decode(data)
+
+    return data
+
+
+def encode_codec_lst(data, codec_lst):
+    for codec in reversed(codec_lst):
+        data = codec.encode(data)
+
+    return data
+
+
+def get_codec_lst_cache_key(data, codec_lst):
+    if not codec_lst or not is_decode_cache_enabled():
+        return None
+
+    if not all(i.cacheable for i in codec_lst):
+        return None
+
+    return get_decode_cache_key(data, [get_codec_cache_name(i) for i in codec_lst])
+
+
+# the flatc backends do not print identical json, and a schema may change
+# under the same client version
+def get_codec_cache_name(codec) -> str:
+    fbs_key = getattr(codec, "fbs_key", None)
+
+    if fbs_key is None:
+        return codec.codec_name
+
+    backend = "flatc" if is_flatc_subprocess_enabled() else "fbs_helper"
+
+    return f"{codec.codec_name}:{backend}:{get_fbs_schema_hash(*fbs_key)}"
+
+
+def is_codec_lst_keep_int64(codec_lst) -> bool:
+    return any(i.keep_int64 for i in codec_lst)
+
+
+def decode_codec_lst_cached(data, codec_lst):
+    cache_key = get_codec_lst_cache_key(data, codec_lst)
+
+    if cache_key is not None:
+        obj = load_decode_cache(cache_key, is_codec_lst_keep_int64(codec_lst))
+
+        if obj is not None:
+            return obj
+
+    obj = decode_codec_lst(data, codec_lst)
+
+    if cache_key is not None:
+        save_decode_cache(cache_key, obj)
+
+    return obj
+
+
 def apply_decorator_lst(func, decorator_lst):
+    codec_lst, decorator_lst = split_decorator_lst_at_codec(decorator_lst)
+
     for decorator in reversed(decorator_lst):
         func = decorator(func)
 
-    return func
+    if not codec_lst:
+        return func
+
+    inner_func = func
+
+    @wraps(inner_func)
+    def wrapper(data):
+        return encode_codec_lst(
+            inner_func(decode_codec_lst_cached(data, codec_lst)), codec_lst
+        )
+
+    return wrapper
+
+
+def split_codec_lst_at_flatc(codec_lst):
+    for i, codec in enumerate(codec_lst):
+        if hasattr(codec, "flatc_key"):
+            return codec_lst[:i], codec, codec_lst[i + 1 :]
+
+    return codec_lst, None, []
+
+
+# req_lst holds (func, decorator_lst, data), the flatc stage of every chain
+# is run through decode_flatc_many/encode_flatc_many instead of one by one,
+# which takes one flatc process per schema to decode and one per client
+# version to encode
+def apply_decorator_lst_many(req_lst: list) -> list:
+    if not is_flatc_subprocess_enabled():
+        return [
+            apply_decorator_lst(func, decorator_lst)(data)
+            for func, decorator_lst, data in req_lst
+        ]
+
+    obj_lst = [None] * len(req_lst)
+
+    flatc_req_dict = {}
+
+    for i, (func, decorator_lst, data) in enumerate(req_lst):
+        codec_lst, _ = split_decorator_lst_at_codec(decorator_lst)
+
+        cache_key = get_codec_lst_cache_key(data, codec_lst)
+
+        if cache_key is not None:
+            obj_lst[i] = load_decode_cache(
+                cache_key, is_codec_lst_keep_int64(codec_lst)
+            )
+
+            if obj_lst[i] is not None:
+                continue
+
+        pre_codec_lst, flatc_codec, _ = split_codec_lst_at_flatc(codec_lst)
+
+        if flatc_codec is None:
+            obj_lst[i] = decode_codec_lst(data, codec_lst)
+        else:
+            flatc_req_dict[i] = (
+                decode_codec_lst(data, pre_codec_lst),
+                *flatc_codec.flatc_key,
+            )
+
+        if cache_key is not None and i not in flatc_req_dict:
+            save_decode_cache(cache_key, obj_lst[i])
+
+    for i, json_str in decode_flatc_many(flatc_req_dict).items():
+        func, decorator_lst, data = req_lst[i]
+
+        codec_lst, _ = split_decorator_lst_at_codec(decorator_lst)
+
+        _, _, post_codec_lst = split_codec_lst_at_flatc(codec_lst)
+
+        obj_lst[i] = decode_codec_lst(json.loads(json_str), post_codec_lst)
+
+        cache_key = get_codec_lst_cache_key(data, codec_lst)
+
+        if cache_key is not None:
+            save_decode_cache(cache_key, obj_lst[i])
+
+    result_lst = [None] * len(req_lst)
+
+    flatc_req_dict = {}
+
+    for i, (func, decorator_lst, _) in enumerate(req_lst):
+        codec_lst, decorator_lst = split_decorator_lst_at_codec(decorator_lst)
+
+        obj = apply_decorator_lst(func, decorator_lst)(obj_lst[i])
+
+        _, flatc_codec, post_codec_lst = split_codec_lst_at_flatc(codec_lst)
+
+        if flatc_codec is None:
+            result_lst[i] = encode_codec_lst(obj, codec_lst)
+        else:
+            flatc_req_dict[i] = (
+                dump_json(encode_codec_lst(obj, post_codec_lst)),
+                *flatc_codec.flatc_key,
+            )
+
+    for i, script_bytes in encode_flatc_many(flatc_req_dict).items():
+        _, decorator_lst, _ = req_lst[i]
+
+        codec_lst, _ = split_decorator_lst_at_codec(decorator_lst)
+
+        pre_codec_lst, _, _ = split_codec_lst_at_flatc(codec_lst)
+
+        result_lst[i] = encode_codec_lst(script_bytes, pre_codec_lst)
+
+    return result_lst
@@ -1,76 +1,14 @@
-from functools import wraps
 from packaging.version import Version
 import json
+from functools import cache
+from dataclasses import dataclass, field
+from importlib import import_module
 
-import flatbuffers
 import bson
 
-from .fbs_codegen.v2_7_61 import (
-    prts___levels_generated as prts___levels_v2_7_61,
-)
-from .fbs_codegen.v2_7_51 import (
-    prts___levels_generated as prts___levels_v2_7_51,
-)
-from .fbs_codegen.v2_7_41 import (
-    prts___levels_generated as prts___levels_v2_7_41,
-)
-from .fbs_codegen.v2_7_31 import (
-    prts___levels_generated as prts___levels_v2_7_31,
-)
-from .fbs_codegen.v2_7_21 import (
-    prts___levels_generated as prts___levels_v2_7_21,
-)
-from .fbs_codegen.v2_7_11 import (
-    prts___levels_generated as prts___levels_v2_7_11,
-)
-from .fbs_codegen.v2_7_01 import (
-    prts___levels_generated as prts___levels_v2_7_01,
-)
-from .fbs_codegen.v2_6_91 import (
-    prts___levels_generated as prts___levels_v2_6_91,
-)
-from .fbs_codegen.v2_6_82 import (
-    prts___levels_generated as prts___levels_v2_6_82,
-)
-from .fbs_codegen.v2_6_71 import (
-    prts___levels_generated as prts___levels_v2_6_71,
-)
-from .fbs_codegen.v2_6_61 import (
-    prts___levels_generated as prts___levels_v2_6_61,
-)
-from .fbs_codegen.v2_6_41 import (
-    prts___levels_generated as prts___levels_v2_6_41,
-)
-from .fbs_codegen.v2_6_21 import (
-    prts___levels_generated as prts___levels_v2_6_21,
-)
-from .fbs_codegen.v2_6_01 import (
-    prts___levels_generated as prts___levels_v2_6_01,
-)
-from .fbs_codegen.v2_5_80 import (
-    prts___levels_generated as prts___levels_v2_5_80,
-)
-from .fbs_codegen.v2_5_60 import (
-    prts___levels_generated as prts___levels_v2_5_60,
-)
-from .fbs_codegen.v2_5_04 import (
-    prts___levels_generated as prts___levels_v2_5_04,
-)
-from .fbs_codegen.v2_4_61 import (
-    prts___levels_generated as prts___levels_v2_4_61,
-)
-
-
 from .helper import (
-    script_decorator,
-    header_decorator,
-    json_decorator,
-    dump_table_decorator,
-    encode_flatc,
-    decode_flatc,
-    nop_mod_table_func,
-    get_mod_level_decorator_lst,
-    apply_decorator_lst,
+    decode_flatc_obj,
+    encode_flatc_obj,
     script_to_bytes,
     bytes_to_script,
     remove_header,
@@ -78,228 +16,328 @@ from .helper import (
     dump_table,
     decrypt_data,
 )
+from .fbs_helper import (
+    FbsKind,
+    FbsEnum,
+    FbsField,
+    FbsTable,
+    FbsSchema,
+    load_fbs_schema,
+    get_fbs_schema_hash,
+    diff_fbs_table,
+)
+
+
+PRTS___LEVELS_CODEGEN_MODULE_DICT = {
+    "2.7.61": ".fbs_codegen.v2_7_61.prts___levels_generated",
+    "2.7.51": ".fbs_codegen.v2_7_51.prts___levels_generated",
+    "2.7.41": ".fbs_codegen.v2_7_41.prts___levels_generated",
+    "2.7.31": ".fbs_codegen.v2_7_31.prts___levels_generated",
+    "2.7.21": ".fbs_codegen.v2_7_21.prts___levels_generated",
+    "2.7.11": ".fbs_codegen.v2_7_11.prts___levels_generated",
+    "2.7.01": ".fbs_codegen.v2_7_01.prts___levels_generated",
+    "2.6.91": ".fbs_codegen.v2_6_91.prts___levels_generated",
+    "2.6.82": ".fbs_codegen.v2_6_82.prts___levels_generated",
+    "2.6.71": ".fbs_codegen.v2_6_71.prts___levels_generated",
+    "2.6.61": ".fbs_codegen.v2_6_61.prts___levels_generated",
+    "2.6.41": ".fbs_codegen.v2_6_41.prts___levels_generated",
+    "2.6.21": ".fbs_codegen.v2_6_21.prts___levels_generated",
+    "2.6.01": ".fbs_codegen.v2_6_01.prts___levels_generated",
+    "2.5.80": ".fbs_codegen.v2_5_80.prts___levels_generated",
+    "2.5.60": ".fbs_codegen.v2_5_60.prts___levels_generated",
+    "2.5.04": ".fbs_codegen.v2_5_04.prts___levels_generated",
+    "2.4.61": ".fbs_codegen.v2_4_61.prts___levels_generated",
+}
+
+
+LEVEL_FBS_NAME = "prts___levels"
+
+
+# several client versions share one schema, load one codegen module per hash
+@cache
+def get_prts___levels_by_schema_hash(schema_hash: str):
+    for client_version, module_name in PRTS___LEVELS_CODEGEN_MODULE_DICT.items():
+        if get_fbs_schema_hash(client_version, LEVEL_FBS_NAME) == schema_hash:
+            return import_module(module_name, __package__)
 
+    raise ValueError(f"fbs codegen not found for {schema_hash}")
 
+
+# the generated modules are huge, only import the ones actually used
+@cache
 def get_prts___levels(client_version: str):
-    match client_version:
-        case "2.7.61":
-            return prts___levels_v2_7_61
+    if client_version not in PRTS___LEVELS_CODEGEN_MODULE_DICT:
+        raise ValueError(f"fbs codegen not found for {client_version}")
 
-        case "2.7.51":
-            return prts___levels_v2_7_51
+    return get_prts___levels_by_schema_hash(
+        get_fbs_schema_hash(client_version, LEVEL_FBS_NAME)
+    )
 
-        case "2.7.41":
-            return prts___levels_v2_7_41
 
-        case "2.7.31":
-            return prts___levels_v2_7_31
+# newer clients expect these to be set, even if only to an undefined value
+LEVEL_UNDEFINABLE_TABLE_PREFIX = "clz_Torappu_Undefinable_"
 
-        case "2.7.21":
-            return prts___levels_v2_7_21
 
-        case "2.7.11":
-            return prts___levels_v2_7_11
+def is_undefinable_field(fbs_field: FbsField) -> bool:
+    return fbs_field.kind == FbsKind.TABLE and fbs_field.table.name.startswith(
+        LEVEL_UNDEFINABLE_TABLE_PREFIX
+    )
 
-        case "2.7.01":
-            return prts___levels_v2_7_01
 
-        case "2.6.91":
-            return prts___levels_v2_6_91
+# filled whenever absent, levels may leave them out even if src already had them
+LEVEL_UNDEFINABLE_FILL_FIELD_DICT = {
+    "clz_Torappu_EnemyDatabase_AttributesData": [
+        "groundBoundImmune",
+        "teleportImmune",
+        "palsyImmune",
+        "attractImmune",
+        "epBreakRecoverSpeed",
+        "disarmedCombatImmune",
+        "fearedImmune",
+        "damageHitratePhysical",
+        "damageHitrateMagical",
+        "epDamageResistance",
+        "epResistance",
+    ],
+    "clz_Torappu_EnemyDatabase_EnemyData": [
+        "applyWay",
+        "motion",
+        "enemyTags",
+        "notCountInTotal",
+        "viewRadius",
+    ],
+}
+
+
+def get_level_undefinable_fill_field_lst(dst_table: FbsTable) -> list[str]:
+    return [
+        i
+        for i in LEVEL_UNDEFINABLE_FILL_FIELD_DICT.get(dst_table.name, [])
+        if i in dst_table.field_dict and is_undefinable_field(dst_table.field_dict[i])
+    ]
 
-        case "2.6.82":
-            return prts___levels_v2_6_82
 
-        case "2.6.71":
-            return prts___levels_v2_6_71
+@dataclass
+class LevelMigratePlan:
+    drop_field_lst: list[str] = field(default_factory=list)
+    fill_field_lst: list[str] = field(default_factory=list)
 
-        case "2.6.61":
-            return prts___levels_v2_6_61
+    # (field name, src enum name -> raw value, for names gone from dst)
+    enum_remap_lst: list[tuple[str, dict]] = field(default_factory=list)
 
-        case "2.6.41":
-            return prts___levels_v2_6_41
+    # (dst field, key of the plan for the nested object)
+    descend_field_lst: list[tuple[FbsField, tuple]] = field(default_factory=list)
 
-        case "2.6.21":
-            return prts___levels_v2_6_21
+    child_key_lst: list[tuple[FbsField, tuple]] = field(default_factory=list)
 
-        case "2.6.01":
-            return prts___levels_v2_6_01
+    layout_changed: bool = False
 
-        case "2.5.80":
-            return prts___levels_v2_5_80
+    # src and dst differ here, fills that apply regardless do not count
+    schema_changed: bool = False
 
-        case "2.5.60":
-            return prts___levels_v2_5_60
 
-        case "2.5.04":
-            return prts___levels_v2_5_04
+@dataclass
+class LevelMigratePlanSet:
+    plan_dict: dict[tuple, LevelMigratePlan] = field(default_factory=dict)
 
-        case "2.4.61":
-            return prts___levels_v2_4_61
+    root_key: tuple = None
 
-        case _:
-            raise ValueError(f"fbs codegen not found for {client_version}")
+    # src bytes can be used as is, nothing to fill, drop or relayout
+    zero_copy: bool = False
 
 
-def migrate_flatc_decorator(
-    src_client_version: str, dst_client_version: str, fbs_name: str
-):
-    def _migrate_flatc_decorator(func):
-        @wraps(func)
-        def wrapper(data):
-            return encode_flatc(
-                func(
-                    decode_flatc(
-                        data,
-                        src_client_version,
-                        fbs_name,
-                    )
-                ),
-                dst_client_version,
-                fbs_name,
-            )
+# the encoder encodes by name, so a name kept in dst keeps its meaning even if
+# renumbered, only names gone from dst fall back to the raw src value
+def get_level_enum_remap_dict(src_enum: FbsEnum, dst_enum: FbsEnum) -> dict:
+    enum_remap_dict = {}
 
-        return wrapper
+    for name, value in src_enum.value_dict.items():
+        if dst_enum is not None and name in dst_enum.value_dict:
+            continue
 
-    return _migrate_flatc_decorator
+        enum_remap_dict[name] = value
 
+    return enum_remap_dict
 
-def get_migrate_level_decorator_lst(
-    level_id: str, src_client_version: str, dst_client_version: str, res_version: str
-):
-    return [
-        script_decorator,
-        header_decorator,
-        migrate_flatc_decorator(
-            src_client_version, dst_client_version, "prts___levels"
-        ),
-        json_decorator,
-        dump_table_decorator(f"{level_id}_{res_version}_migrate"),
-    ]
 
+# a plan is keyed by (src table name, dst table name), src table name is None
+# for legacy json levels, which have no src schema
+def compile_level_migrate_plan(src_table: FbsTable, dst_table: FbsTable):
+    plan = LevelMigratePlan()
 
-def get_codegen_migrate_level_decorator_lst():
-    return [
-        script_decorator,
-        header_decorator,
-    ]
+    if src_table is None:
+        plan.fill_field_lst = [
+            i.name for i in dst_table.field_lst if is_undefinable_field(i)
+        ]
+        plan.child_key_lst = [
+            (i, (None, i.table.name))
+            for i in dst_table.field_lst
+            if i.kind == FbsKind.TABLE
+        ]
+        plan.layout_changed = True
+        plan.schema_changed = True
 
+        return plan
 
-def handle_obj_in_level(obj, prts___levels):
-    if isinstance(obj, prts___levels.clz_Torappu_EnemyDatabase_AttributesDataT):
-        if hasattr(obj, "groundBoundImmune") and obj.groundBoundImmune is None:
-            obj.groundBoundImmune = (
-                prts___levels.clz_Torappu_Undefinable_1_System_Boolean_T()
-            )
+    table_diff = diff_fbs_table(src_table, dst_table)
 
-        if hasattr(obj, "teleportImmune") and obj.teleportImmune is None:
-            obj.teleportImmune = (
-                prts___levels.clz_Torappu_Undefinable_1_System_Boolean_T()
-            )
+    plan.drop_field_lst = [i.name for i in table_diff.removed_field_lst]
 
-        if hasattr(obj, "palsyImmune") and obj.palsyImmune is None:
-            obj.palsyImmune = prts___levels.clz_Torappu_Undefinable_1_System_Boolean_T()
+    plan.fill_field_lst = [
+        i.name for i in table_diff.added_field_lst if is_undefinable_field(i)
+    ]
 
-        if hasattr(obj, "attractImmune") and obj.attractImmune is None:
-            obj.attractImmune = (
-                prts___levels.clz_Torappu_Undefinable_1_System_Boolean_T()
+    for src_field, dst_field in table_diff.changed_field_lst:
+        if (
+            src_field.kind != dst_field.kind
+            or src_field.is_vector != dst_field.is_vector
+        ):
+            plan.drop_field_lst.append(src_field.name)
+
+            if is_undefinable_field(dst_field):
+                plan.fill_field_lst.append(dst_field.name)
+
+        elif src_field.enum is not None:
+            enum_remap_dict = get_level_enum_remap_dict(src_field.enum, dst_field.enum)
+
+            if enum_remap_dict:
+                plan.enum_remap_lst.append((dst_field.name, enum_remap_dict))
+
+    for dst_field in dst_table.field_lst:
+        src_field = src_table.field_dict.get(dst_field.name)
+
+        if (
+            dst_field.kind == FbsKind.TABLE
+            and src_field is not None
+            and src_field.kind == FbsKind.TABLE
+            and src_field.is_vector == dst_field.is_vector
+        ):
+            plan.child_key_lst.append(
+                (dst_field, (src_field.table.name, dst_field.table.name))
             )
 
-        if hasattr(obj, "epBreakRecoverSpeed") and obj.epBreakRecoverSpeed is None:
-            obj.epBreakRecoverSpeed = (
-                prts___levels.clz_Torappu_Undefinable_1_System_Single_T()
-            )
+    plan.layout_changed = bool(
+        table_diff.removed_field_lst or table_diff.changed_field_lst
+    )
 
-        if hasattr(obj, "disarmedCombatImmune") and obj.disarmedCombatImmune is None:
-            obj.disarmedCombatImmune = (
-                prts___levels.clz_Torappu_Undefinable_1_System_Boolean_T()
-            )
+    plan.schema_changed = bool(
+        plan.layout_changed or plan.fill_field_lst or plan.enum_remap_lst
+    )
 
-        if hasattr(obj, "fearedImmune") and obj.fearedImmune is None:
-            obj.fearedImmune = (
-                prts___levels.clz_Torappu_Undefinable_1_System_Boolean_T()
-            )
+    for field_name in get_level_undefinable_fill_field_lst(dst_table):
+        if field_name not in plan.fill_field_lst:
+            plan.fill_field_lst.append(field_name)
 
-        if hasattr(obj, "damageHitratePhysical") and obj.damageHitratePhysical is None:
-            obj.damageHitratePhysical = (
-                prts___levels.clz_Torappu_Undefinable_1_System_Single_T()
-            )
+    return plan
 
-        if hasattr(obj, "damageHitrateMagical") and obj.damageHitrateMagical is None:
-            obj.damageHitrateMagical = (
-                prts___levels.clz_Torappu_Undefinable_1_System_Single_T()
-            )
 
-        if hasattr(obj, "epDamageResistance") and obj.epDamageResistance is None:
-            obj.epDamageResistance = (
-                prts___levels.clz_Torappu_Undefinable_1_System_Single_T()
-            )
+def compile_level_migrate_plan_set(
+    src_schema: FbsSchema, dst_schema: FbsSchema
+) -> LevelMigratePlanSet:
+    plan_set = LevelMigratePlanSet()
 
-        if hasattr(obj, "epResistance") and obj.epResistance is None:
-            obj.epResistance = prts___levels.clz_Torappu_Undefinable_1_System_Single_T()
+    plan_set.root_key = (
+        src_schema.root_table.name if src_schema is not None else None,
+        dst_schema.root_table.name,
+    )
 
-        return
+    key_lst = [plan_set.root_key]
 
-    if isinstance(obj, prts___levels.clz_Torappu_EnemyDatabase_EnemyDataT):
-        if hasattr(obj, "applyWay") and obj.applyWay is None:
-            obj.applyWay = (
-                prts___levels.clz_Torappu_Undefinable_1_Torappu_SourceApplyWay_T()
-            )
+    while key_lst:
+        key = key_lst.pop()
 
-        if hasattr(obj, "motion") and obj.motion is None:
-            obj.motion = prts___levels.clz_Torappu_Undefinable_1_Torappu_MotionMode_T()
+        if key in plan_set.plan_dict:
+            continue
 
-        if hasattr(obj, "enemyTags") and obj.enemyTags is None:
-            obj.enemyTags = prts___levels.clz_Torappu_Undefinable_1_System_String___T()
+        src_table_name, dst_table_name = key
 
-        if hasattr(obj, "notCountInTotal") and obj.notCountInTotal is None:
-            obj.notCountInTotal = (
-                prts___levels.clz_Torappu_Undefinable_1_System_Boolean_T()
-            )
+        plan = compile_level_migrate_plan(
+            src_schema.table_dict[src_table_name] if src_table_name else None,
+            dst_schema.table_dict[dst_table_name],
+        )
 
-        if hasattr(obj, "viewRadius") and obj.viewRadius is None:
-            obj.viewRadius = prts___levels.clz_Torappu_Undefinable_1_System_Single_T()
+        plan_set.plan_dict[key] = plan
 
-        return
+        key_lst.extend(i for _, i in plan.child_key_lst)
 
+    # only descend into objects that can reach something to fill or drop
+    relevant_key_set = {
+        k
+        for k, v in plan_set.plan_dict.items()
+        if v.drop_field_lst or v.fill_field_lst or v.enum_remap_lst
+    }
 
-def recursive_handle_obj_in_level(obj, prts___levels):
-    handle_obj_in_level(obj, prts___levels)
+    changed = True
+    while changed:
+        changed = False
 
-    if isinstance(obj, list):
-        for i in obj:
-            recursive_handle_obj_in_level(
-                i,
-                prts___levels,
-            )
-        return
+        for key, plan in plan_set.plan_dict.items():
+            if key in relevant_key_set:
+                continue
 
-    if not hasattr(obj, "__dict__"):
-        return
+            if any(i in relevant_key_set for _, i in plan.child_key_lst):
+                relevant_key_set.add(key)
+                changed = True
 
-    for i in obj.__dict__.values():
-        recursive_handle_obj_in_level(
-            i,
-            prts___levels,
-        )
+    for plan in plan_set.plan_dict.values():
+        plan.descend_field_lst = [
+            i for i in plan.child_key_lst if i[1] in relevant_key_set
+        ]
 
+    plan_set.zero_copy = not any(i.schema_changed for i in plan_set.plan_dict.values())
+
+    return plan_set
 
-def get_codegen_migrate_func(
-    dst_client_version: str,
-):
-    def _codegen_migrate_func(level_bytes: bytes) -> bytes:
-        prts___levels = get_prts___levels(dst_client_version)
 
-        level_obj = prts___levels.clz_Torappu_LevelDataT.InitFromPackedBuf(level_bytes)
+@cache
+def load_level_migrate_plan_set(
+    src_client_version: str, dst_client_version: str
+) -> LevelMigratePlanSet:
+    if is_legacy_json_level(src_client_version):
+        src_schema = None
+    else:
+        src_schema = load_fbs_schema(src_client_version, LEVEL_FBS_NAME)
+
+    return compile_level_migrate_plan_set(
+        src_schema, load_fbs_schema(dst_client_version, LEVEL_FBS_NAME)
+    )
 
-        recursive_handle_obj_in_level(level_obj, prts___levels)
 
-        builder = flatbuffers.Builder()
-        builder.Finish(level_obj.Pack(builder))
-        level_bytes = bytes(builder.Output())
+def handle_obj_in_level(obj: dict, plan: LevelMigratePlan):
+    for field_name in plan.drop_field_lst:
+        obj.pop(field_name, None)
 
-        return level_bytes
+    for field_name in plan.fill_field_lst:
+        if obj.get(field_name) is None:
+            obj[field_name] = {}
 
-    return _codegen_migrate_func
+    for field_name, enum_remap_dict in plan.enum_remap_lst:
+        v = obj.get(field_name)
+
+        if isinstance(v, list):
+            obj[field_name] = [enum_remap_dict.get(i, i) for i in v]
+        elif v is not None:
+            obj[field_name] = enum_remap_dict.get(v, v)
+
+
+def recursive_handle_obj_in_level(
+    obj: dict, key: tuple, plan_dict: dict[tuple, LevelMigratePlan]
+):
+    plan = plan_dict[key]
+
+    handle_obj_in_level(obj, plan)
+
+    for fbs_field, child_key in plan.descend_field_lst:
+        v = obj.get(fbs_field.name)
+
+        if v is None:
+            continue
+
+        if fbs_field.is_vector:
+            for i in v:
+                recursive_handle_obj_in_level(i, child_key, plan_dict)
+        else:
+            recursive_handle_obj_in_level(v, child_key, plan_dict)
 
 
 def convert_legacy_json_level_mapData(level):
@@ -409,13 +447,7 @@ def convert_legacy_json_level(level_id: str, level):
         convert_legacy_json_bossrush_level(level)
 
 
-def migrate_legacy_json_level(
-    level_str: str,
-    level_id: str,
-    src_client_version: str,
-    dst_client_version: str,
-    res_version: str,
-) -> str:
+def load_legacy_json_level(level_str: str, level_id: str, res_version: str):
     try:
         level = bson.decode(remove_header(script_to_bytes(level_str)))
     except Exception:
@@ -427,17 +459,31 @@ def migrate_legacy_json_level(
 
     dump_table(level, f"{level_id}_{res_version}_migrate_json_post.json")
 
-    level_str = bytes_to_script(
-        add_header(
-            encode_flatc(
-                json.dumps(level, ensure_ascii=False, indent=4),
-                dst_client_version,
-                "prts___levels",
-            )
-        )
-    )
+    return level
+
+
+def is_legacy_json_level(client_version: str) -> bool:
+    return Version(client_version) < Version("2.0.40")
+
 
-    return level_str
+def is_same_level_schema(src_client_version: str, dst_client_version: str) -> bool:
+    if is_legacy_json_level(src_client_version):
+        return False
+
+    return get_fbs_schema_hash(
+        src_client_version, LEVEL_FBS_NAME
+    ) == get_fbs_schema_hash(dst_client_version, LEVEL_FBS_NAME)
+
+
+def load_level(
+    level_str: str, level_id: str, src_client_version: str, res_version: str
+):
+    if is_legacy_json_level(src_client_version):
+        return load_legacy_json_level(level_str, level_id, res_version)
+
+    return decode_flatc_obj(
+        remove_header(script_to_bytes(level_str)), src_client_version, LEVEL_FBS_NAME
+    )
 
 
 def migrate_level(
@@ -447,48 +493,22 @@ def migrate_level(
     res_version: str,
     level_str: str,
 ) -> str:
-    if Version(src_client_version) < Version("2.0.40"):
-        is_legacy_json_level = True
-    else:
-        is_legacy_json_level = False
+    if is_same_level_schema(src_client_version, dst_client_version):
+        return level_str
 
-    if is_legacy_json_level:
-        level_str = migrate_legacy_json_level(
-            level_str, level_id, src_client_version, dst_client_version, res_version
-        )
-    else:
-        migrate_level_decorator_lst = get_migrate_level_decorator_lst(
-            level_id, src_client_version, dst_client_version, res_version
-        )
+    plan_set = load_level_migrate_plan_set(src_client_version, dst_client_version)
 
-        migrate_func = nop_mod_table_func
+    if plan_set.zero_copy:
+        return level_str
 
-        migrate_func = apply_decorator_lst(migrate_func, migrate_level_decorator_lst)
+    level = load_level(level_str, level_id, src_client_version, res_version)
 
-        level_str = migrate_func(level_str)
+    dump_table(level, f"{level_id}_{res_version}_migrate_pre.json")
 
-    # ----------
+    recursive_handle_obj_in_level(level, plan_set.root_key, plan_set.plan_dict)
 
-    codegen_migrate_level_decorator_lst = get_codegen_migrate_level_decorator_lst()
+    dump_table(level, f"{level_id}_{res_version}_migrate_post.json")
 
-    codegen_migrate_func = get_codegen_migrate_func(dst_client_version)
-
-    codegen_migrate_func = apply_decorator_lst(
-        codegen_migrate_func, codegen_migrate_level_decorator_lst
+    return bytes_to_script(
+        add_header(encode_flatc_obj(level, dst_client_version, LEVEL_FBS_NAME))
     )
-
-    level_str = codegen_migrate_func(level_str)
-
-    # ----------
-
-    log_decorator_lst = get_mod_level_decorator_lst(
-        level_id, dst_client_version, res_version
-    )
-
-    log_func = nop_mod_table_func
-
-    log_func = apply_decorator_lst(log_func, log_decorator_lst)
-
-    level_str = log_func(level_str)
-
-    return level_str
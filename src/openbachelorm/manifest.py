@@ -1,20 +1,35 @@
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from copy import deepcopy
 from pathlib import Path
-import shutil
+import bisect
+import sys
 import random
 from packaging.version import Version
 import json
 
 
-from anytree import Node, PreOrderIter
 from UnityPy import Environment
 from UnityPy.files import SerializedFile
 import UnityPy
 
-from .resource import Resource
+from .resource import Resource, peek_obj_name
+from .cache_helper import (
+    is_manifest_snapshot_enabled,
+    get_manifest_snapshot_filepath,
+    load_manifest_snapshot,
+    save_manifest_snapshot,
+)
+from .config import config
 from .const import TMP_DIRPATH
-from .helper import download_asset
+from .helper import (
+    download_asset,
+    download_asset_many,
+    get_asset_dat_filepath,
+    link_file,
+    unlink_file,
+    write_file_atomic,
+)
 from .level_helper import migrate_level
 
 
@@ -50,91 +65,169 @@ def download_bundle(bundle: ManifestBundle) -> Path:
         bundle.manifest.resource.res_version,
         bundle.name,
         bundle.manifest.resource.platform_name,
+        bundle.manifest.resource.get_ab_hash(bundle.name),
     )
 
 
-def get_node_path(node: Node) -> str:
-    return "/".join([i.name for i in node.path[1:]])
+def normalize_asset_path(path: str) -> str:
+    return "/".join(Path(path).parts)
 
 
-def add_node_to_parent(parent: Node, name: str, node: Node):
-    if parent is not None:
-        if not parent.is_dir:
-            raise KeyError(f"{get_node_path(parent)} not a dir")
-        if name in parent.child_dict:
-            raise KeyError(f"{get_node_path(node)} already exist")
-        parent.child_dict[name] = node
+def get_asset_path_key(path: str) -> list[str]:
+    return path.split("/")
 
 
-def new_dir_node(dir_name: str, parent: Node = None) -> Node:
-    node = Node(dir_name, parent=parent, is_dir=True, child_dict={})
-    add_node_to_parent(parent, dir_name, node)
-    return node
+@dataclass
+class AssetNode:
+    name: str
+    asset: "ManifestAsset"
+    bundle_name: str = ""
 
 
-def new_file_node(file_name: str, parent: Node = None, **kwargs):
-    node = Node(file_name, parent=parent, is_dir=False, **kwargs)
-    add_node_to_parent(parent, file_name, node)
-    return node
+# flat replacement for a per-asset node tree, file paths map to their value
+# and directories only exist implicitly as path prefixes
+class AssetPathIndex:
+    def __init__(self, name: str):
+        self.name = name
 
+        self.path_dict: dict[str, object] = {}
+        self.dir_set: set[str] = set()
 
-def get_node_by_path(root: Node, path: str, dir_ok=False) -> Node:
-    node = root
-    for i in Path(path).parts:
-        if not node.is_dir:
-            raise KeyError(f"{get_node_path(node)} not a dir")
-        if i not in node.child_dict:
-            return None
+        # sorted by path components, so a directory is a contiguous run
+        self.sorted_path_lst: list[str] = None
 
-        node = node.child_dict[i]
+    def get_parent_dir_lst(self, path: str) -> list[str]:
+        parts = get_asset_path_key(path)
 
-    if not dir_ok and node.is_dir:
-        raise KeyError(f"{get_node_path(node)} not a file")
+        return ["/".join(parts[:i]) for i in range(1, len(parts))]
 
-    return node
+    def add(self, path: str, value):
+        path = normalize_asset_path(path)
 
+        if path in self.path_dict or path in self.dir_set:
+            raise KeyError(f"{path} already exist")
 
-def is_file_in_tree(root: Node, path: str) -> bool:
-    node = get_node_by_path(root, path)
-    if node is None:
-        return False
-    return True
+        parent_dir_lst = self.get_parent_dir_lst(path)
 
+        for parent_dir in parent_dir_lst:
+            if parent_dir in self.path_dict:
+                raise KeyError(f"{parent_dir} not a dir")
 
-def create_child_node_if_necessary(node: Node, child_name: str) -> Node:
-    if not node.is_dir:
-        raise KeyError(f"{get_node_path(node)} not a dir")
+        self.dir_set.update(parent_dir_lst)
+
+        self.path_dict[sys.intern(path)] = value
+
+        self.sorted_path_lst = None
+
+    def get(self, path: str):
+        path = normalize_asset_path(path)
+
+        value = self.path_dict.get(path)
+
+        if value is not None:
+            return value
+
+        if path in self.dir_set:
+            raise KeyError(f"{path} not a file")
+
+        for parent_dir in self.get_parent_dir_lst(path):
+            if parent_dir in self.path_dict:
+                raise KeyError(f"{parent_dir} not a dir")
+
+        return None
+
+    # refills an empty index from a snapshot, path_lst must already be sorted
+    def restore(self, path_lst: list[str], value_lst: list, dir_lst: list[str]):
+        if len(path_lst) != len(value_lst):
+            raise ValueError("path and value count mismatch")
+
+        path_lst = [sys.intern(i) for i in path_lst]
+
+        self.path_dict = dict(zip(path_lst, value_lst))
+        self.dir_set = set(dir_lst)
+
+        self.sorted_path_lst = path_lst
+
+    def get_sorted_path_lst(self) -> list[str]:
+        if self.sorted_path_lst is None:
+            self.sorted_path_lst = sorted(self.path_dict, key=get_asset_path_key)
+
+        return self.sorted_path_lst
+
+    # yields (path, value) of every file below dir_path
+    def iter_dir(self, dir_path: str = ""):
+        sorted_path_lst = self.get_sorted_path_lst()
+
+        dir_path = normalize_asset_path(dir_path)
+
+        if not dir_path:
+            for path in sorted_path_lst:
+                yield path, self.path_dict[path]
+            return
+
+        dir_prefix = f"{dir_path}/"
+
+        for i in range(
+            bisect.bisect_left(
+                sorted_path_lst,
+                get_asset_path_key(dir_path),
+                key=get_asset_path_key,
+            ),
+            len(sorted_path_lst),
+        ):
+            path = sorted_path_lst[i]
+
+            if not path.startswith(dir_prefix):
+                break
+
+            yield path, self.path_dict[path]
+
+
+def new_dir_node(dir_name: str) -> AssetPathIndex:
+    return AssetPathIndex(dir_name)
 
-    if child_name not in node.child_dict:
-        child = new_dir_node(child_name, node)
-    else:
-        child = node.child_dict[child_name]
 
-    return child
+def get_node_by_path(root: AssetPathIndex, path: str):
+    return root.get(path)
 
 
-def add_file_to_tree(root: Node, path: str, **kwargs) -> Node:
-    path_obj = Path(path)
+def is_file_in_tree(root: AssetPathIndex, path: str) -> bool:
+    return root.get(path) is not None
 
-    node = root
 
-    for dir_name in path_obj.parent.parts:
-        node = create_child_node_if_necessary(node, dir_name)
+def add_file_to_tree(root: AssetPathIndex, path: str, **kwargs) -> AssetNode:
+    node = AssetNode(name=Path(path).name, **kwargs)
 
-    node = new_file_node(path_obj.name, node, **kwargs)
+    root.add(path, node)
 
     return node
 
 
-def dump_tree(root: Node, filename: str):
+def dump_tree(root: AssetPathIndex, filename: str):
     tree_filepath = Path(
         TMP_DIRPATH,
         filename,
     )
     indent = "    "
     with open(tree_filepath, "w", encoding="utf-8") as f:
-        for node in PreOrderIter(root):
-            print(f"{indent * node.depth}{node.name}", file=f)
+        print(root.name, file=f)
+
+        prev_dir_parts = []
+
+        for path in root.get_sorted_path_lst():
+            parts = get_asset_path_key(path)
+
+            depth = 0
+            while (
+                depth < min(len(prev_dir_parts), len(parts) - 1)
+                and prev_dir_parts[depth] == parts[depth]
+            ):
+                depth += 1
+
+            for i in range(depth, len(parts)):
+                print(f"{indent * (i + 1)}{parts[i]}", file=f)
+
+            prev_dir_parts = parts[:-1]
 
 
 PSEUDO_ASSET_SUFFIX = ".openbachelorm"
@@ -150,25 +243,48 @@ def remove_asset_suffix(asset_path: str):
 
 ASSET_TREE_ROOT_NAME = "openbachelorm"
 
+DEFAULT_MANIFEST_MAX_WORKERS = 4
+
+
+def is_legacy_manifest(res: Resource) -> bool:
+    return Version(res.client_version) < Version("2.4.01")
+
+
+def get_manifest_snapshot_name(res: Resource) -> str:
+    if is_legacy_manifest(res):
+        return res.get_manifest_snapshot_name("pseudo_manifest")
+
+    return res.get_manifest_snapshot_name(
+        "manifest", res.get_ab_hash(res.hot_update_list["manifestName"])
+    )
+
+
+def get_asset_tree_snapshot_name(res: Resource) -> str:
+    return f"asset_tree_{get_manifest_snapshot_name(res)}"
+
 
 class ManifestManager:
-    def __init__(self, res: Resource):
+    # state comes from ManifestManager.get_state, e.g. of a worker process
+    def __init__(self, res: Resource, state: dict | None = None):
         self.resource = res
 
+        if state is None:
+            state = {}
+
         if Version(res.client_version) > Version("2.4.61"):
             self.is_legacy_unity = False
         else:
             self.is_legacy_unity = True
 
-        if Version(res.client_version) < Version("2.4.01"):
-            res.load_legacy_pseudo_manifest()
+        if is_legacy_manifest(res):
+            res.load_legacy_pseudo_manifest(state.get("manifest"))
         else:
-            res.load_manifest()
+            res.load_manifest(state.get("manifest"))
 
         self.manifest = res.manifest
 
         self.build_bundle_lst()
-        self.build_asset_tree()
+        self.build_asset_tree(state.get("asset_tree"))
 
     def build_bundle_lst(self):
         self.bundle_lst: list[ManifestBundle] = []
@@ -195,31 +311,144 @@ class ManifestManager:
             for i in bundle.allDependencies:
                 bundle.dep_on_lst.append(self.bundle_lst[i])
 
-    def build_asset_tree(self):
+    def get_asset(self, asset_idx: int) -> ManifestAsset:
+        asset_dict = self.manifest["assetToBundleList"][asset_idx]
+
+        bundle_idx = asset_dict.get("bundleIndex", 0)
+
+        return ManifestAsset(
+            assetName=asset_dict.get("assetName"),
+            bundleIndex=bundle_idx,
+            name=asset_dict.get("name"),
+            path=asset_dict.get("path"),
+            manifest=self,
+            bundle=self.bundle_lst[bundle_idx],
+        )
+
+    # paths map to the index into assetToBundleList, ManifestAsset objects are
+    # only built for the assets that get merged
+    def build_asset_tree(self, asset_tree_state: dict | None = None):
         self.asset_tree_root = new_dir_node(ASSET_TREE_ROOT_NAME)
         self.dangling_asset_lst: list[ManifestAsset] = []
+        self.dangling_asset_idx_lst: list[int] = []
 
-        for asset_dict in self.manifest["assetToBundleList"]:
-            bundle_idx = asset_dict.get("bundleIndex", 0)
-            asset = ManifestAsset(
-                assetName=asset_dict.get("assetName"),
-                bundleIndex=bundle_idx,
-                name=asset_dict.get("name"),
-                path=asset_dict.get("path"),
-                manifest=self,
-                bundle=self.bundle_lst[bundle_idx],
-            )
+        snapshot_name = get_asset_tree_snapshot_name(self.resource)
 
-            if not asset.assetName:
-                self.dangling_asset_lst.append(asset)
+        if self.load_asset_tree_state(snapshot_name, asset_tree_state):
+            return
+
+        for i, asset_dict in enumerate(self.manifest["assetToBundleList"]):
+            asset_name = asset_dict.get("assetName")
+
+            if not asset_name:
+                self.dangling_asset_lst.append(self.get_asset(i))
+                self.dangling_asset_idx_lst.append(i)
                 continue
 
-            asset_path = get_asset_path(asset.assetName)
+            self.asset_tree_root.add(get_asset_path(asset_name), i)
 
-            add_file_to_tree(self.asset_tree_root, asset_path, asset=asset)
+        save_manifest_snapshot(snapshot_name, self.get_asset_tree_state())
 
         dump_tree(self.asset_tree_root, f"asset_tree_{self.resource.res_version}.txt")
 
+    def get_asset_tree_state(self) -> dict:
+        path_lst = self.asset_tree_root.get_sorted_path_lst()
+
+        return {
+            "path_lst": path_lst,
+            "asset_idx_lst": [self.asset_tree_root.path_dict[i] for i in path_lst],
+            "dir_lst": sorted(self.asset_tree_root.dir_set),
+            "dangling_asset_idx_lst": self.dangling_asset_idx_lst,
+        }
+
+    def load_asset_tree_state(
+        self, snapshot_name: str, asset_tree_state: dict | None = None
+    ) -> bool:
+        if asset_tree_state is None:
+            asset_tree_state = load_manifest_snapshot(snapshot_name)
+
+        if asset_tree_state is None:
+            return False
+
+        try:
+            self.asset_tree_root.restore(
+                asset_tree_state["path_lst"],
+                asset_tree_state["asset_idx_lst"],
+                asset_tree_state["dir_lst"],
+            )
+            dangling_asset_idx_lst = asset_tree_state["dangling_asset_idx_lst"]
+        except (KeyError, TypeError, ValueError):
+            self.asset_tree_root = new_dir_node(ASSET_TREE_ROOT_NAME)
+            return False
+
+        self.dangling_asset_idx_lst = dangling_asset_idx_lst
+        self.dangling_asset_lst = [self.get_asset(i) for i in dangling_asset_idx_lst]
+
+        return True
+
+    # picklable, so that it can be built in a worker process
+    def get_state(self) -> dict:
+        return {
+            "manifest": self.resource.get_manifest_state(),
+            "asset_tree": self.get_asset_tree_state(),
+        }
+
+
+def build_manifest_manager_state(
+    client_version: str, res_version: str, platform_name: str
+) -> dict:
+    return ManifestManager(
+        Resource(client_version, res_version, platform_name)
+    ).get_state()
+
+
+def is_manifest_manager_snapshot_cached(res: Resource) -> bool:
+    if not is_manifest_snapshot_enabled():
+        return False
+
+    return all(
+        get_manifest_snapshot_filepath(i).is_file()
+        for i in (
+            get_manifest_snapshot_name(res),
+            get_asset_tree_snapshot_name(res),
+        )
+    )
+
+
+def get_manifest_max_workers() -> int:
+    return config.get("manifest_max_workers", DEFAULT_MANIFEST_MAX_WORKERS)
+
+
+# resources without a snapshot yet are built concurrently in worker processes,
+# the rest load their snapshots in this process
+def build_manifest_manager_many(res_lst: list[Resource]) -> list[ManifestManager]:
+    state_lst: list[dict | None] = [None] * len(res_lst)
+
+    pending_idx_lst = [
+        i
+        for i, res in enumerate(res_lst)
+        if not is_manifest_manager_snapshot_cached(res)
+    ]
+
+    max_workers = min(get_manifest_max_workers(), len(pending_idx_lst))
+
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            future_dict = {
+                i: executor.submit(
+                    build_manifest_manager_state,
+                    res_lst[i].client_version,
+                    res_lst[i].res_version,
+                    res_lst[i].platform_name,
+                )
+                for i in pending_idx_lst
+            }
+
+            for i, future in future_dict.items():
+                state_lst[i] = future.result()
+
+    return [ManifestManager(res, state) for res, state in zip(res_lst, state_lst)]
+
 
 def get_special_anon_bundle(mgr: ManifestManager) -> ManifestBundle:
     return mgr.bundle_dict["arts/clue_hub.ab"].dep_on_lst[0]
@@ -294,12 +523,10 @@ def get_act_asset_map(res: Resource):
         if obj.type.name != "TextAsset":
             continue
 
-        data = obj.read()
-
-        if data.m_Name != "act_asset_map":
+        if peek_obj_name(obj) != "act_asset_map":
             continue
 
-        return data
+        return obj.read()
 
     return None
 
@@ -349,13 +576,13 @@ def migrate_activity_bundle(
         if obj.type.name != "TextAsset":
             continue
 
-        data = obj.read()
-
-        level_id = data.m_Name
+        level_id = peek_obj_name(obj)
 
         if level_id not in level_id_set:
             continue
 
+        data = obj.read()
+
         data.m_Script = migrate_level(
             level_id,
             src_client_version,
@@ -366,7 +593,9 @@ def migrate_activity_bundle(
 
         data.save()
 
-    merger_bundle_filepath.write_bytes(env.file.save())
+    # replaced rather than written in place, the staged bundle may still be a
+    # hardlink into asset/
+    write_file_atomic(merger_bundle_filepath, env.file.save())
 
 
 @dataclass
@@ -393,12 +622,17 @@ class ManifestMerger:
         self.src_res_lst = src_res_lst
         self.platform_name = platform_name
 
-        self.target_res_manager = ManifestManager(target_res)
-        self.src_res_manager_lst = [ManifestManager(i) for i in src_res_lst]
+        self.target_res_manager, *self.src_res_manager_lst = (
+            build_manifest_manager_many([target_res, *src_res_lst])
+        )
 
         self.merger_tree_root = new_dir_node(MERGER_TREE_ROOT_NAME)
         self.merger_bundle_dict: dict[str, MergerBundle] = {}
 
+        # (st_ino, st_size, st_mtime_ns) right after staging, to tell untouched
+        # bundles
+        self.merger_bundle_stat_dict: dict[str, tuple[int, int, int]] = {}
+
     def recursive_add_bundle(self, bundle: ManifestBundle, bundle_name: str = ""):
         if not bundle_name:
             bundle_name = bundle.name
@@ -426,22 +660,25 @@ class ManifestMerger:
             self.recursive_add_bundle(dep_on)
 
     def merge_single_src_res(self, src_res_manager: ManifestManager):
-        for node in PreOrderIter(src_res_manager.asset_tree_root):
-            if node.is_dir:
-                continue
-
-            path = get_node_path(node)
+        src_tree_root = src_res_manager.asset_tree_root
 
-            if is_file_in_tree(self.target_res_manager.asset_tree_root, path):
-                continue
+        new_path_set = (
+            src_tree_root.path_dict.keys()
+            - self.target_res_manager.asset_tree_root.path_dict.keys()
+            - self.merger_tree_root.path_dict.keys()
+        )
 
-            if is_file_in_tree(self.merger_tree_root, path):
+        # walk the already sorted src paths to keep a stable merge order
+        for path in src_tree_root.get_sorted_path_lst():
+            if path not in new_path_set:
                 continue
 
             if not is_merger_tree_path_allowed(path):
                 continue
 
-            bundle_name = node.asset.bundle.name
+            asset = src_res_manager.get_asset(src_tree_root.path_dict[path])
+
+            bundle_name = asset.bundle.name
 
             # hardcode for now
             if bundle_name == "gamedata/levels/activities.ab":
@@ -450,11 +687,11 @@ class ManifestMerger:
             add_file_to_tree(
                 self.merger_tree_root,
                 path,
-                asset=node.asset,
+                asset=asset,
                 bundle_name=bundle_name,
             )
 
-            self.recursive_add_bundle(node.asset.bundle, bundle_name)
+            self.recursive_add_bundle(asset.bundle, bundle_name)
 
     def merge_src_res(self):
         for src_res_manager in self.src_res_manager_lst:
@@ -477,29 +714,21 @@ class ManifestMerger:
         )
 
     def copy_zonemap_node(self):
-        activity_node = get_node_by_path(self.merger_tree_root, "activity", dir_ok=True)
-
-        zonemap_node_lst = []
-
-        for node in activity_node.child_dict.values():
-            if not node.is_dir:
-                continue
-
-            if "zonemaps" not in node.child_dict:
-                continue
+        zonemap_path_lst = []
 
-            zonemaps_node = node.child_dict["zonemaps"]
+        # activity/<act>/zonemaps/<file>
+        for path, _ in self.merger_tree_root.iter_dir("activity"):
+            parts = get_asset_path_key(path)
 
-            for zonemap_node in zonemaps_node.child_dict.values():
-                if zonemap_node.is_dir:
-                    continue
+            if len(parts) == 4 and parts[2] == "zonemaps":
+                zonemap_path_lst.append(path)
 
-                zonemap_node_lst.append(zonemap_node)
+        for zonemap_path in zonemap_path_lst:
+            src_asset_name = remove_asset_suffix(zonemap_path)
 
-        for zonemap_node in zonemap_node_lst:
-            src_asset_name = remove_asset_suffix(get_node_path(zonemap_node))
-
-            dst_asset_name = remove_asset_suffix(f"ui/zonemaps/{zonemap_node.name}")
+            dst_asset_name = remove_asset_suffix(
+                f"ui/zonemaps/{Path(zonemap_path).name}"
+            )
 
             self.copy_merger_tree_node(src_asset_name, dst_asset_name)
 
@@ -537,27 +766,55 @@ class ManifestMerger:
     def get_merger_bundle_filepath(self, bundle_name: str):
         return Path(TMP_DIRPATH, self.mod_name, bundle_name)
 
+    def prefetch_merger_bundle(self):
+        download_asset_many(
+            [
+                (
+                    merger_bundle.bundle.manifest.resource.res_version,
+                    merger_bundle.bundle.name,
+                    merger_bundle.bundle.manifest.resource.platform_name,
+                    merger_bundle.bundle.manifest.resource.get_ab_hash(
+                        merger_bundle.bundle.name
+                    ),
+                )
+                for merger_bundle in self.merger_bundle_dict.values()
+            ]
+        )
+
+    # staged bundles are hardlinks (or reflinks) of the downloaded ones, an
+    # edit must either replace the file or go through materialize_merger_bundle
     def prep_merger_bundle(self):
+        self.prefetch_merger_bundle()
+
         for bundle_name, merger_bundle in self.merger_bundle_dict.items():
             bundle_filepath = download_bundle(merger_bundle.bundle)
 
             merger_bundle_filepath = self.get_merger_bundle_filepath(bundle_name)
 
-            merger_bundle_filepath.parent.mkdir(parents=True, exist_ok=True)
+            link_file(bundle_filepath, merger_bundle_filepath)
 
-            shutil.copy(bundle_filepath, merger_bundle_filepath)
+            self.merger_bundle_stat_dict[bundle_name] = self.get_merger_bundle_stat(
+                bundle_name
+            )
 
-    def migrate_level(self):
-        activity_node = get_node_by_path(
-            self.merger_tree_root, "gamedata/levels/activities/", dir_ok=True
-        )
+    def get_merger_bundle_stat(self, bundle_name: str) -> tuple[int, int, int]:
+        st = self.get_merger_bundle_filepath(bundle_name).stat()
+
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    # returns a staged bundle path that is safe to write in place
+    def materialize_merger_bundle(self, bundle_name: str) -> Path:
+        merger_bundle_filepath = self.get_merger_bundle_filepath(bundle_name)
+
+        unlink_file(merger_bundle_filepath)
 
+        return merger_bundle_filepath
+
+    def migrate_level(self):
         bundle_name_set: set[str] = set()
         level_id_set: set[str] = set()
 
-        for node in PreOrderIter(activity_node):
-            if node.is_dir:
-                continue
+        for _, node in self.merger_tree_root.iter_dir("gamedata/levels/activities/"):
             if node.bundle_name in self.merger_bundle_dict:
                 bundle_name_set.add(node.bundle_name)
 
@@ -595,16 +852,43 @@ class ManifestMerger:
         for i, bundle_obj in enumerate(self.new_manifest["bundles"]):
             self.bundle_idx_dict[bundle_obj["name"]] = i
 
+    def get_merger_bundle_dat_filepath(self, bundle_name: str) -> Path | None:
+        merger_bundle = self.merger_bundle_dict[bundle_name]
+
+        bundle = merger_bundle.bundle
+
+        # a renamed bundle does not match the member name inside its .dat
+        if bundle_name != bundle.name:
+            return None
+
+        if self.merger_bundle_stat_dict.get(bundle_name) != self.get_merger_bundle_stat(
+            bundle_name
+        ):
+            return None
+
+        asset_dat_filepath = get_asset_dat_filepath(
+            bundle.manifest.resource.res_version, bundle.name
+        )
+
+        if not asset_dat_filepath.is_file():
+            return None
+
+        return asset_dat_filepath
+
     def build_mod_bundle(self):
         next_scc_idx = self.build_mod_bundle_get_next_scc_idx()
 
         for bundle_name, merger_bundle in self.merger_bundle_dict.items():
             merger_bundle_filepath = self.get_merger_bundle_filepath(bundle_name)
 
-            self.target_res.register_foreign_asset(bundle_name, merger_bundle_filepath)
-
             bundle = merger_bundle.bundle
 
+            self.target_res.register_foreign_asset(
+                bundle_name,
+                merger_bundle_filepath,
+                self.get_merger_bundle_dat_filepath(bundle_name),
+            )
+
             if self.target_res_manager.is_legacy_unity:
                 self.new_manifest["bundles"].append(
                     {
@@ -644,11 +928,7 @@ class ManifestMerger:
                 )
 
     def build_mod_asset(self):
-        for node in PreOrderIter(self.merger_tree_root):
-            if node.is_dir:
-                continue
-
-            path = get_node_path(node)
+        for path, node in self.merger_tree_root.iter_dir():
             path_obj = Path(path)
 
             self.new_manifest["assetToBundleList"].append(
@@ -1,4 +1,11 @@
+import bisect
+import hashlib
 import json
+import shutil
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
 from pathlib import Path
 import zipfile
 from zipfile import ZipFile
@@ -9,50 +16,82 @@ from packaging.version import Version
 from .helper import (
     download_hot_update_list,
     download_asset,
+    download_asset_many,
+    get_hot_update_list_hash_dict,
+    get_tmp_filepath,
+    diff_hot_update_list,
+    get_local_res_version_lst,
+    seed_asset_store,
+    HOT_UPDATE_LIST_JSON,
+    HotUpdateListDiff,
     escape_ab_name,
     write_mod,
+    write_mod_from_file,
     get_manifest,
     dump_table,
     get_manifest_bytes,
     apply_decorator_lst,
+    apply_decorator_lst_many,
 )
-from .const import TMP_DIRPATH, ASSET_DIRPATH, MOD_DIRPATH
+from .fbs_helper import get_fbs_view_by_path, set_fbs_view_by_path
+from .cache_helper import load_manifest_snapshot, save_manifest_snapshot
+from .config import config
+from .const import TMP_DIRPATH, ASSET_DIRPATH, MOD_DIRPATH, ANON_ASSET_INDEX_DIRPATH
 
 
-def get_anon_asset_name_set(asset_env: UnityPy.Environment):
-    anon_asset_name_set: set[str] = set()
+# reads m_Name only, the m_Script of a TextAsset can be megabytes
+def peek_obj_name(obj) -> str:
+    name = obj.peek_name()
 
-    for obj in asset_env.objects:
-        if obj.type.name == "TextAsset":
-            data = obj.read()
+    if name is None:
+        name = obj.read().m_Name
 
-            anon_asset_name_set.add(data.m_Name)
+    return name
 
-    return anon_asset_name_set
 
+# m_Name to TextAsset object, the first one wins like a linear scan would
+def build_text_asset_index(asset_env: UnityPy.Environment) -> dict:
+    text_asset_index = {}
 
-def get_table_data_by_prefix(asset_env: UnityPy.Environment, table_prefix: str):
     for obj in asset_env.objects:
         if obj.type.name == "TextAsset":
-            data = obj.read()
+            text_asset_index.setdefault(peek_obj_name(obj), obj)
 
-            if data.m_Name.startswith(table_prefix):
-                return data
+    return text_asset_index
 
-    return None
 
+# kept on the env itself, so the index lives and dies with it
+TEXT_ASSET_INDEX_ATTR = "openbachelorm_text_asset_index"
 
-def get_level_data_by_level_id(asset_env: UnityPy.Environment, level_id: str):
-    for obj in asset_env.objects:
-        if obj.type.name == "TextAsset":
-            data = obj.read()
 
-            if data.m_Name == level_id:
-                return data
+def get_text_asset_index(asset_env: UnityPy.Environment) -> dict:
+    text_asset_index = getattr(asset_env, TEXT_ASSET_INDEX_ATTR, None)
+
+    if text_asset_index is None:
+        text_asset_index = build_text_asset_index(asset_env)
+
+        setattr(asset_env, TEXT_ASSET_INDEX_ATTR, text_asset_index)
+
+    return text_asset_index
+
+
+def get_table_data_by_prefix(text_asset_index: dict, table_prefix: str):
+    for name, obj in text_asset_index.items():
+        if name.startswith(table_prefix):
+            return obj.read()
 
     return None
 
 
+def get_level_data_by_level_id(text_asset_index: dict, level_id: str):
+    obj = text_asset_index.get(level_id)
+
+    if obj is None:
+        return None
+
+    return obj.read()
+
+
 def get_mod_filepath(mod_dirpath: Path, ab_name: str):
     return (mod_dirpath / escape_ab_name(ab_name)).with_suffix(".dat")
 
@@ -149,6 +188,45 @@ def build_legacy_pseudo_manifest(torappu_index_tree, torappu_tree):
     return pseudo_manifest
 
 
+@dataclass
+class TableMod:
+    table_prefix: str
+    mod_table_func: Callable
+    decorator_lst: list
+
+    table_asset_name_prefix: str = ""
+    no_manifest: bool = False
+
+
+DEFAULT_ASSET_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
+
+# decompressed size of the files inside a loaded env, roughly what it keeps in
+# memory, the bundle on disk is lz4 compressed
+def get_asset_env_size(asset_env: UnityPy.Environment) -> int:
+    size = 0
+
+    file_lst = list(asset_env.files.values())
+
+    while file_lst:
+        f = file_lst.pop()
+
+        # a SerializedFile reads from its reader, a raw file is a reader itself
+        size += getattr(getattr(f, "reader", f), "Length", 0)
+
+        file_lst.extend(getattr(f, "files", {}).values())
+
+    return size
+
+
+def is_delta_sync_enabled() -> bool:
+    return config.get("delta_sync", True)
+
+
+def get_asset_cache_max_size() -> int:
+    return config.get("asset_cache_max_size", DEFAULT_ASSET_CACHE_MAX_SIZE)
+
+
 class Resource:
     def __init__(
         self, client_version: str, res_version: str, platform_name: str = "Android"
@@ -157,7 +235,15 @@ class Resource:
         self.res_version = res_version
         self.platform_name = platform_name
 
-        self.asset_dict: dict[str, UnityPy.Environment] = {}
+        # lru order, budgeted by decompressed env size
+        self.asset_dict: OrderedDict[str, UnityPy.Environment] = OrderedDict()
+        self.asset_size_dict: dict[str, int] = {}
+        self.asset_cache_size = 0
+
+        # an evicted env still referenced by a caller is handed out again
+        # instead of being reloaded as a second, diverging copy
+        self.evicted_asset_dict = weakref.WeakValueDictionary()
+
         self.modified_asset_set: set[str] = set()
 
         self.anon_ab_name_set: set[str] = None
@@ -167,40 +253,112 @@ class Resource:
         self.manifest_modified = False
 
         self.foreign_asset_dict: dict[str, Path] = {}
+        self.foreign_asset_dat_dict: dict[str, Path] = {}
 
         self.load_hot_update_list()
 
+        if is_delta_sync_enabled():
+            prev_res_version = self.get_prev_res_version()
+
+            if prev_res_version is not None:
+                self.sync_from_res_version(prev_res_version)
+
     def load_hot_update_list(self):
         hot_update_list_filepath = download_hot_update_list(
             self.res_version, self.platform_name
         )
 
-        with open(hot_update_list_filepath, encoding="utf-8") as f:
-            hot_update_list = json.load(f)
+        hot_update_list_bytes = hot_update_list_filepath.read_bytes()
+
+        hot_update_list = json.loads(hot_update_list_bytes)
 
         self.hot_update_list = hot_update_list
+        self.hot_update_list_hash = hashlib.sha256(hot_update_list_bytes).hexdigest()
+
+        self.ab_hash_dict = get_hot_update_list_hash_dict(hot_update_list)
+
+    def get_ab_hash(self, ab_name: str) -> str:
+        return self.ab_hash_dict.get(ab_name, "")
+
+    # the newest local res version older than this one
+    def get_prev_res_version(self) -> str | None:
+        prev_res_version_lst = [
+            i for i in get_local_res_version_lst() if i < self.res_version
+        ]
+
+        if not prev_res_version_lst:
+            return None
+
+        return prev_res_version_lst[-1]
+
+    # seeds the asset store with the bundles left unchanged since
+    # prev_res_version, so that only added and changed bundles are downloaded
+    def sync_from_res_version(self, prev_res_version: str) -> HotUpdateListDiff:
+        with open(
+            Path(ASSET_DIRPATH, prev_res_version, HOT_UPDATE_LIST_JSON),
+            encoding="utf-8",
+        ) as f:
+            prev_hot_update_list = json.load(f)
+
+        diff = diff_hot_update_list(prev_hot_update_list, self.hot_update_list)
+
+        seeded_cnt = seed_asset_store(prev_res_version, diff, self.ab_hash_dict)
 
-    def load_manifest(self):
+        if seeded_cnt:
+            print(
+                f"info: {seeded_cnt} bundles synced from {prev_res_version}, "
+                f"{len(diff.added_lst)} added, {len(diff.changed_lst)} changed, "
+                f"{len(diff.removed_lst)} removed"
+            )
+
+        return diff
+
+    # manifest_state, e.g. built in another process, takes the place of the
+    # snapshot lookup
+    def load_manifest(self, manifest_state: dict | None = None):
         if self.manifest_loaded:
             return
 
         self.manifest_ab_name = self.hot_update_list["manifestName"]
 
+        snapshot_name = self.get_manifest_snapshot_name(
+            "manifest", self.get_ab_hash(self.manifest_ab_name)
+        )
+
+        self.manifest_snapshot_name = snapshot_name
+
+        if self.load_manifest_state(snapshot_name, manifest_state):
+            return
+
         self.manifest = get_manifest(
             download_asset(
-                self.res_version, self.manifest_ab_name, self.platform_name
+                self.res_version,
+                self.manifest_ab_name,
+                self.platform_name,
+                self.get_ab_hash(self.manifest_ab_name),
             ).read_bytes(),
             self.client_version,
         )
 
         self.manifest_loaded = True
 
+        self.build_manifest_index()
+
+        self.save_manifest_snapshot(snapshot_name)
+
         dump_table(self.manifest, f"manifest_{self.res_version}_pre.json")
 
-    def load_legacy_pseudo_manifest(self):
+    def load_legacy_pseudo_manifest(self, manifest_state: dict | None = None):
         if self.manifest_loaded:
             return
 
+        snapshot_name = self.get_manifest_snapshot_name("pseudo_manifest")
+
+        self.manifest_snapshot_name = snapshot_name
+
+        if self.load_manifest_state(snapshot_name, manifest_state):
+            return
+
         torappu_index_ab = self.load_asset("torappu_index.ab")
         torappu_index_tree = get_torappu_index_tree(torappu_index_ab, self.res_version)
 
@@ -211,45 +369,213 @@ class Resource:
 
         self.manifest_loaded = True
 
+        self.build_manifest_index()
+
+        self.save_manifest_snapshot(snapshot_name)
+
         dump_table(self.manifest, f"pseudo_manifest_{self.res_version}_pre.json")
 
+    def build_manifest_index(self, sorted_asset_idx_lst: list[int] | None = None):
+        asset_to_bundle_lst = self.manifest["assetToBundleList"]
+
+        # first entry wins, as with a linear scan
+        self.manifest_asset_index: dict[str, int] = {}
+
+        for i, asset_obj in enumerate(asset_to_bundle_lst):
+            self.manifest_asset_index.setdefault(asset_obj["assetName"], i)
+
+        if sorted_asset_idx_lst is None:
+            self.manifest_sorted_asset_lst: list[tuple[str, int]] = sorted(
+                (asset_obj["assetName"], i)
+                for i, asset_obj in enumerate(asset_to_bundle_lst)
+            )
+        else:
+            self.manifest_sorted_asset_lst = [
+                (asset_to_bundle_lst[i]["assetName"], i) for i in sorted_asset_idx_lst
+            ]
+
+    # the decoded manifest depends on the client version schema as well as on
+    # the bundle content, fall back to the hot update list hash when the
+    # bundle hash is unknown
+    def get_manifest_snapshot_name(self, manifest_kind: str, ab_hash: str = "") -> str:
+        content_hash = ab_hash if ab_hash.isalnum() else self.hot_update_list_hash
+
+        return (
+            f"{manifest_kind}_{self.client_version}_{self.res_version}_{content_hash}"
+        )
+
+    def get_manifest_state(self) -> dict:
+        return {
+            "manifest": self.manifest,
+            "sorted_asset_idx_lst": [i for _, i in self.manifest_sorted_asset_lst],
+        }
+
+    def load_manifest_state(
+        self, snapshot_name: str, manifest_state: dict | None = None
+    ) -> bool:
+        if manifest_state is None:
+            manifest_state = load_manifest_snapshot(snapshot_name)
+
+        if manifest_state is None:
+            return False
+
+        try:
+            self.manifest = manifest_state["manifest"]
+            sorted_asset_idx_lst = manifest_state["sorted_asset_idx_lst"]
+        except (KeyError, TypeError):
+            return False
+
+        self.manifest_loaded = True
+
+        self.build_manifest_index(sorted_asset_idx_lst)
+
+        return True
+
+    def save_manifest_snapshot(self, snapshot_name: str):
+        save_manifest_snapshot(snapshot_name, self.get_manifest_state())
+
     def get_ab_name_from_manifest(self, asset_obj):
         return self.manifest["bundles"][asset_obj["bundleIndex"]]["name"]
 
     def query_manifest(self, asset_name: str):
         self.load_manifest()
 
-        for asset_obj in self.manifest["assetToBundleList"]:
-            if asset_obj["assetName"] == asset_name:
-                return self.get_ab_name_from_manifest(asset_obj)
+        i = self.manifest_asset_index.get(asset_name)
 
-        raise KeyError(f"{asset_name} not found")
+        if i is None:
+            raise KeyError(f"{asset_name} not found")
+
+        return self.get_ab_name_from_manifest(self.manifest["assetToBundleList"][i])
 
     def query_manifest_by_prefix(self, asset_name_prefix: str):
         self.load_manifest()
 
-        for asset_obj in self.manifest["assetToBundleList"]:
-            if asset_obj["assetName"].startswith(asset_name_prefix):
-                return self.get_ab_name_from_manifest(asset_obj)
+        sorted_asset_lst = self.manifest_sorted_asset_lst
+
+        # names sharing a prefix are contiguous once sorted, the earliest entry
+        # among them is what a linear scan would have found
+        first_i = None
+
+        for j in range(
+            bisect.bisect_left(sorted_asset_lst, (asset_name_prefix,)),
+            len(sorted_asset_lst),
+        ):
+            asset_name, i = sorted_asset_lst[j]
+
+            if not asset_name.startswith(asset_name_prefix):
+                break
+
+            if first_i is None or i < first_i:
+                first_i = i
+
+        if first_i is None:
+            raise KeyError(f"{asset_name_prefix} not found")
+
+        return self.get_ab_name_from_manifest(
+            self.manifest["assetToBundleList"][first_i]
+        )
+
+    # one merge walk over the sorted index for all prefixes, in sorted order
+    # the start of each prefix run only moves forward
+    def query_manifest_by_prefix_many(self, asset_name_prefix_lst: list[str]):
+        self.load_manifest()
 
-        raise KeyError(f"{asset_name_prefix} not found")
+        sorted_asset_lst = self.manifest_sorted_asset_lst
+
+        ab_name_lst = [None] * len(asset_name_prefix_lst)
+
+        start_j = 0
+
+        for k, asset_name_prefix in sorted(
+            enumerate(asset_name_prefix_lst), key=lambda x: x[1]
+        ):
+            while (
+                start_j < len(sorted_asset_lst)
+                and sorted_asset_lst[start_j][0] < asset_name_prefix
+            ):
+                start_j += 1
+
+            first_i = None
+
+            for j in range(start_j, len(sorted_asset_lst)):
+                asset_name, i = sorted_asset_lst[j]
+
+                if not asset_name.startswith(asset_name_prefix):
+                    break
+
+                if first_i is None or i < first_i:
+                    first_i = i
+
+            if first_i is None:
+                raise KeyError(f"{asset_name_prefix} not found")
+
+            ab_name_lst[k] = self.get_ab_name_from_manifest(
+                self.manifest["assetToBundleList"][first_i]
+            )
+
+        return ab_name_lst
 
     def load_asset(self, ab_name: str):
         if ab_name in self.asset_dict:
+            self.asset_dict.move_to_end(ab_name)
             return self.asset_dict[ab_name]
 
-        asset_filepath = download_asset(self.res_version, ab_name, self.platform_name)
+        asset_filepath = download_asset(
+            self.res_version, ab_name, self.platform_name, self.get_ab_hash(ab_name)
+        )
+
+        asset_env = self.evicted_asset_dict.pop(ab_name, None)
 
-        asset_env = UnityPy.load(asset_filepath.as_posix())
+        if asset_env is None:
+            asset_env = UnityPy.load(asset_filepath.as_posix())
 
         self.asset_dict[ab_name] = asset_env
 
+        asset_size = max(get_asset_env_size(asset_env), asset_filepath.stat().st_size)
+        self.asset_size_dict[ab_name] = asset_size
+        self.asset_cache_size += asset_size
+
+        self.evict_asset()
+
         return asset_env
 
-    def register_anon_asset_name(self, ab_name: str, asset_env: UnityPy.Environment):
-        anon_asset_name_set = get_anon_asset_name_set(asset_env)
+    def evict_asset(self):
+        max_size = get_asset_cache_max_size()
+
+        if self.asset_cache_size <= max_size:
+            return
+
+        # the most recently loaded env always stays
+        for ab_name in list(self.asset_dict)[:-1]:
+            if self.asset_cache_size <= max_size:
+                break
+
+            # modified envs are only written out by build_mod
+            if ab_name in self.modified_asset_set:
+                continue
+
+            asset_env = self.asset_dict.pop(ab_name)
 
-        for anon_asset_name in anon_asset_name_set:
+            self.asset_cache_size -= self.asset_size_dict.pop(ab_name)
+
+            self.evicted_asset_dict[ab_name] = asset_env
+
+    def prefetch(self, ab_name_lst: list[str]):
+        download_asset_many(
+            [
+                (
+                    self.res_version,
+                    ab_name,
+                    self.platform_name,
+                    self.get_ab_hash(ab_name),
+                )
+                for ab_name in ab_name_lst
+                if ab_name not in self.asset_dict
+            ]
+        )
+
+    def register_anon_asset_name(self, ab_name: str, asset_env: UnityPy.Environment):
+        for anon_asset_name in get_text_asset_index(asset_env):
             if anon_asset_name not in self.anon_asset_name_dict:
                 self.anon_asset_name_dict[anon_asset_name] = set()
 
@@ -271,18 +597,75 @@ class Resource:
 
             self.level_ab_name_set.add(next(iter(ab_name_set)))
 
+    def get_anon_asset_index_filepath(self) -> Path:
+        return Path(
+            ANON_ASSET_INDEX_DIRPATH,
+            f"{self.res_version}_{self.hot_update_list_hash}.json",
+        )
+
+    def load_anon_asset_index(self) -> bool:
+        try:
+            with open(self.get_anon_asset_index_filepath(), encoding="utf-8") as f:
+                anon_asset_index = json.load(f)
+
+            anon_ab_name_set = set(anon_asset_index["anon_ab_name_lst"])
+            anon_asset_name_dict = {
+                k: set(v) for k, v in anon_asset_index["anon_asset_name_dict"].items()
+            }
+
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return False
+
+        self.anon_ab_name_set = anon_ab_name_set
+        self.anon_asset_name_dict = anon_asset_name_dict
+
+        return True
+
+    def save_anon_asset_index(self):
+        anon_asset_index_filepath = self.get_anon_asset_index_filepath()
+
+        anon_asset_index_filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_filepath = get_tmp_filepath()
+
+        try:
+            with open(tmp_filepath, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "anon_ab_name_lst": sorted(self.anon_ab_name_set),
+                        "anon_asset_name_dict": {
+                            k: sorted(v) for k, v in self.anon_asset_name_dict.items()
+                        },
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+
+            tmp_filepath.replace(anon_asset_index_filepath)
+
+        finally:
+            tmp_filepath.unlink(missing_ok=True)
+
     def load_anon_asset(self) -> set[str]:
         if self.anon_ab_name_set is not None:
             return
 
+        # names only, bundles are still loaded on demand by load_asset
+        if self.load_anon_asset_index():
+            self.build_level_ab_name_set()
+            return
+
         self.anon_ab_name_set = set()
 
-        for ab_info in self.hot_update_list["abInfos"]:
-            ab_name = ab_info["name"]
+        anon_ab_name_lst = [
+            ab_info["name"]
+            for ab_info in self.hot_update_list["abInfos"]
+            if ab_info["name"].startswith("anon/")
+        ]
 
-            if not ab_name.startswith("anon/"):
-                continue
+        self.prefetch(anon_ab_name_lst)
 
+        for ab_name in anon_ab_name_lst:
             asset_env = self.load_asset(ab_name)
             self.anon_ab_name_set.add(ab_name)
 
@@ -290,7 +673,12 @@ class Resource:
 
         self.build_level_ab_name_set()
 
+        self.save_anon_asset_index()
+
     def mark_modified_asset(self, ab_name: str):
+        if ab_name not in self.asset_dict and ab_name in self.evicted_asset_dict:
+            self.load_asset(ab_name)
+
         if ab_name not in self.asset_dict:
             raise KeyError(f"{ab_name} not loaded")
 
@@ -317,10 +705,16 @@ class Resource:
             )
 
         for ab_name, ab_path in self.foreign_asset_dict.items():
-            write_mod(
+            ab_dat_path = self.foreign_asset_dat_dict.get(ab_name)
+
+            if ab_dat_path is not None and ab_dat_path.is_file():
+                shutil.copyfile(ab_dat_path, get_mod_filepath(mod_dirpath, ab_name))
+                continue
+
+            write_mod_from_file(
                 get_mod_filepath(mod_dirpath, ab_name),
                 ab_name,
-                ab_path.read_bytes(),
+                ab_path,
             )
 
     def get_table_ab_name(self, table_prefix: str):
@@ -332,11 +726,9 @@ class Resource:
 
         raise FileNotFoundError(f"{table_prefix} not found")
 
-    def mod_table(
+    def load_table_data(
         self,
         table_prefix: str,
-        mod_table_func,
-        decorator_lst,
         table_asset_name_prefix: str = "",
         no_manifest=False,
     ):
@@ -353,7 +745,19 @@ class Resource:
 
         self.mark_modified_asset(table_ab_name)
 
-        data = get_table_data_by_prefix(table_asset_env, table_prefix)
+        return get_table_data_by_prefix(
+            get_text_asset_index(table_asset_env), table_prefix
+        )
+
+    def mod_table(
+        self,
+        table_prefix: str,
+        mod_table_func,
+        decorator_lst,
+        table_asset_name_prefix: str = "",
+        no_manifest=False,
+    ):
+        data = self.load_table_data(table_prefix, table_asset_name_prefix, no_manifest)
 
         mod_table_func = apply_decorator_lst(mod_table_func, decorator_lst)
 
@@ -361,6 +765,64 @@ class Resource:
 
         data.save()
 
+    # patch_lst holds (path, value), with a view decorator present scalars are
+    # overwritten inside the original buffer
+    def patch_table(
+        self,
+        table_prefix: str,
+        patch_lst: list[tuple[list, object]],
+        decorator_lst,
+        table_asset_name_prefix: str = "",
+        no_manifest=False,
+    ):
+        def patch_table_func(table):
+            for path, value in patch_lst:
+                # a callable value maps the current one to the new one
+                if callable(value):
+                    value = value(get_fbs_view_by_path(table, path))
+
+                set_fbs_view_by_path(table, path, value)
+
+            return table
+
+        self.mod_table(
+            table_prefix,
+            patch_table_func,
+            decorator_lst,
+            table_asset_name_prefix,
+            no_manifest,
+        )
+
+    def mod_table_many(self, table_mod_lst: list[TableMod]):
+        self.prefetch(
+            self.query_manifest_by_prefix_many(
+                [
+                    i.table_asset_name_prefix
+                    for i in table_mod_lst
+                    if not i.no_manifest and i.table_asset_name_prefix
+                ]
+            )
+        )
+
+        data_lst = [
+            self.load_table_data(
+                i.table_prefix, i.table_asset_name_prefix, i.no_manifest
+            )
+            for i in table_mod_lst
+        ]
+
+        script_lst = apply_decorator_lst_many(
+            [
+                (i.mod_table_func, i.decorator_lst, data.m_Script)
+                for i, data in zip(table_mod_lst, data_lst)
+            ]
+        )
+
+        for data, script in zip(data_lst, script_lst):
+            data.m_Script = script
+
+            data.save()
+
     def get_level_ab_name(self, level_id: str):
         self.load_anon_asset()
 
@@ -402,7 +864,9 @@ class Resource:
         mod_level_func,
         decorator_lst,
     ):
-        level_data = get_level_data_by_level_id(asset_env, level_id)
+        level_data = get_level_data_by_level_id(
+            get_text_asset_index(asset_env), level_id
+        )
 
         mod_level_func = apply_decorator_lst(mod_level_func, decorator_lst)
 
@@ -417,5 +881,13 @@ class Resource:
         self.manifest_modified = True
         self.new_manifest = new_manifest
 
-    def register_foreign_asset(self, ab_name: str, ab_path: Path):
+    # ab_dat_path is an original .dat holding ab_path unchanged under ab_name
+    def register_foreign_asset(
+        self, ab_name: str, ab_path: Path, ab_dat_path: Path | None = None
+    ):
         self.foreign_asset_dict[ab_name] = ab_path
+
+        if ab_dat_path is not None:
+            self.foreign_asset_dat_dict[ab_name] = ab_dat_path
+        else:
+            self.foreign_asset_dat_dict.pop(ab_name, None)
@@ -0,0 +1,131 @@
+import json
+import os
+
+import bson
+from bson.int64 import Int64
+
+from openbachelorm.cache_helper import (
+    evict_decode_cache,
+    get_decode_cache_entry_lst,
+    get_decode_cache_key,
+    get_manifest_snapshot_filepath,
+    load_decode_cache,
+    load_manifest_snapshot,
+    save_decode_cache,
+    save_manifest_snapshot,
+)
+from openbachelorm.config import config
+from openbachelorm.helper import (
+    apply_decorator_lst,
+    bson_decorator,
+    encoding_decorator,
+    flatc_json_decorator,
+    get_codec_lst_cache_key,
+    json_decorator,
+    nop_mod_table_func,
+)
+
+
+def test_decode_cache_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    key = get_decode_cache_key("data", ["script", "json"])
+
+    assert key != get_decode_cache_key("data", ["script", "bson"])
+
+    assert load_decode_cache(key) is None
+
+    obj = {"a": [1, 2**40, "中文", 0.5, None, True]}
+
+    save_decode_cache(key, obj)
+
+    cached = load_decode_cache(key)
+
+    assert cached == obj
+    assert type(cached["a"][1]) is int
+
+
+def test_decode_cache_chain(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def mod_table_func(table):
+        table["b"] = 2
+        return table
+
+    decorator_lst = [encoding_decorator, json_decorator]
+
+    data = json.dumps({"a": 1}).encode("utf-8")
+
+    for _ in range(2):
+        result = apply_decorator_lst(mod_table_func, decorator_lst)(data)
+
+        assert json.loads(result) == {"a": 1, "b": 2}
+
+    assert len(get_decode_cache_entry_lst()) == 1
+
+
+def test_decode_cache_bson_int64(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    data = bson.encode({"a": Int64(1), "b": 2})
+
+    result_lst = [
+        apply_decorator_lst(nop_mod_table_func, [bson_decorator])(data)
+        for _ in range(2)
+    ]
+
+    assert len(get_decode_cache_entry_lst()) == 1
+    assert result_lst[0] == result_lst[1] == data
+
+
+def test_decode_cache_key_backend(monkeypatch):
+    codec_lst = [flatc_json_decorator("2.7.61", "character_table")]
+
+    monkeypatch.setitem(config, "flatc_subprocess", False)
+
+    key = get_codec_lst_cache_key(b"data", codec_lst)
+
+    monkeypatch.setitem(config, "flatc_subprocess", True)
+
+    assert get_codec_lst_cache_key(b"data", codec_lst) != key
+
+
+def test_decode_cache_evict(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    key_lst = [get_decode_cache_key(str(i), []) for i in range(3)]
+
+    for i, key in enumerate(key_lst):
+        save_decode_cache(key, {"i": i})
+
+        entry = next(j for j in get_decode_cache_entry_lst() if key in j.name)
+        os.utime(entry.path, (i, i))
+
+    size = get_decode_cache_entry_lst()[0].stat().st_size
+
+    evict_decode_cache(size * 2)
+
+    assert load_decode_cache(key_lst[0]) is None
+    assert load_decode_cache(key_lst[2]) == {"i": 2}
+
+
+def test_manifest_snapshot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    snapshot_name = "manifest_2.7.61_25-01-01-00-00-00-abc_0123"
+
+    assert load_manifest_snapshot(snapshot_name) is None
+
+    snapshot = {
+        "manifest": {"bundles": [{"name": "a.ab"}], "assetToBundleList": []},
+        "sorted_asset_idx_lst": [0],
+    }
+
+    save_manifest_snapshot(snapshot_name, snapshot)
+
+    assert load_manifest_snapshot(snapshot_name) == snapshot
+
+    get_manifest_snapshot_filepath(snapshot_name).write_bytes(b"broken")
+
+    assert load_manifest_snapshot(snapshot_name) is None
+    assert not get_manifest_snapshot_filepath(snapshot_name).exists()
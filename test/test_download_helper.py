@@ -0,0 +1,107 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from openbachelorm import download_helper
+from openbachelorm.download_helper import (
+    DownloadError,
+    close_idle_conn,
+    download_url,
+    get_download_stat,
+)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status: int, body: bytes, **header_dict):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in header_dict.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+
+        with server.lock:
+            server.port_set.add(self.client_address[1])
+            server.request_cnt_dict[self.path] = (
+                server.request_cnt_dict.get(self.path, 0) + 1
+            )
+            request_cnt = server.request_cnt_dict[self.path]
+
+        match self.path:
+            case "/flaky" if request_cnt < 3:
+                self.send_body(503, b"")
+            case "/flaky":
+                self.send_body(200, b"flaky")
+            case "/redirect":
+                self.send_body(302, b"", Location="/big")
+            case "/big":
+                self.send_body(200, server.big_body)
+            case "/missing":
+                self.send_body(404, b"")
+            case _:
+                self.send_body(200, self.path.encode())
+
+
+@pytest.fixture
+def stand_in_server(monkeypatch):
+    monkeypatch.setattr(download_helper, "DOWNLOAD_RETRY_BACKOFF", 0)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.port_set = set()
+    server.request_cnt_dict = {}
+    server.big_body = bytes(range(256)) * 4096 * 3
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        close_idle_conn()
+        server.shutdown()
+        server.server_close()
+
+
+def test_download_url_keep_alive(stand_in_server, tmp_path):
+    server, base_url = stand_in_server
+
+    stat = get_download_stat()
+
+    for i in range(5):
+        filepath = tmp_path / f"{i}.bin"
+
+        assert download_url(f"{base_url}/file{i}?q=1", filepath) == len(f"/file{i}?q=1")
+        assert filepath.read_bytes() == f"/file{i}?q=1".encode()
+
+    assert len(server.port_set) == 1
+    assert get_download_stat().file_cnt - stat.file_cnt == 5
+
+
+def test_download_url_retry_and_redirect(stand_in_server, tmp_path):
+    server, base_url = stand_in_server
+
+    filepath = tmp_path / "flaky.bin"
+    download_url(f"{base_url}/flaky", filepath)
+
+    assert filepath.read_bytes() == b"flaky"
+    assert server.request_cnt_dict["/flaky"] == 3
+
+    filepath = tmp_path / "big.bin"
+    download_url(f"{base_url}/redirect", filepath)
+
+    assert filepath.read_bytes() == server.big_body
+
+    with pytest.raises(DownloadError):
+        download_url(f"{base_url}/missing", tmp_path / "missing.bin")
+
+    assert server.request_cnt_dict["/missing"] == 1
@@ -0,0 +1,210 @@
+from openbachelorm.fbs_helper import (
+    decode_fbs,
+    decode_fbs_view,
+    diff_fbs_table,
+    encode_fbs,
+    encode_fbs_view,
+    get_fbs_schema_hash,
+    load_fbs_schema,
+    parse_fbs,
+    set_fbs_view_by_path,
+)
+
+SAMPLE_FBS = """
+enum enum__Sample_Kind : int {
+    NONE = 0,
+    FOO = 1,
+    BAR = 2,
+}
+
+table dict__string__int {
+    key: string(key);
+    value: int;
+}
+
+table clz_Sample {
+    name: string;
+    kind: enum__Sample_Kind;
+    ratio: float;
+    big: long;
+    flags: [bool];
+    tags: [string];
+    items: [dict__string__int];
+}
+
+root_type clz_Sample;
+"""
+
+
+def test_fbs_roundtrip():
+    schema = parse_fbs(SAMPLE_FBS)
+
+    obj = {
+        "name": "sample",
+        "kind": "BAR",
+        "ratio": 0.1,
+        "big": 2**40,
+        "flags": [True, False],
+        "tags": ["a", "中文"],
+        "items": [
+            {"key": "b", "value": 2},
+            {"key": "a", "value": 1},
+        ],
+    }
+
+    decoded = decode_fbs(encode_fbs(obj, schema), schema)
+
+    assert decoded == {
+        "name": "sample",
+        "kind": "BAR",
+        "ratio": 0.1,
+        "big": 2**40,
+        "flags": [True, False],
+        "tags": ["a", "中文"],
+        "items": [
+            {"key": "a", "value": 1},
+            {"key": "b", "value": 2},
+        ],
+    }
+
+
+def test_fbs_default_omitted():
+    schema = parse_fbs(SAMPLE_FBS)
+
+    decoded = decode_fbs(encode_fbs({"kind": "NONE", "big": 0}, schema), schema)
+
+    assert decoded == {}
+
+
+def test_fbs_resource_manifest():
+    schema = load_fbs_schema("2.7.61", "resource_manifest")
+
+    manifest = {
+        "bundles": [
+            {"name": "anon/a.ab", "props": 1, "allDependencies": [1]},
+            {"name": "b.ab", "sccIndex": 3, "allDependencies": []},
+        ],
+        "assetToBundleList": [
+            {"assetName": "gamedata/excel/a", "bundleIndex": 1},
+        ],
+    }
+
+    assert decode_fbs(encode_fbs(manifest, schema), schema) == manifest
+
+
+def test_fbs_schema_hash():
+    assert get_fbs_schema_hash("2.6.61", "prts___levels") == get_fbs_schema_hash(
+        "2.7.11", "prts___levels"
+    )
+    assert get_fbs_schema_hash("2.7.51", "prts___levels") != get_fbs_schema_hash(
+        "2.7.61", "prts___levels"
+    )
+
+    assert load_fbs_schema("2.6.61", "prts___levels") is load_fbs_schema(
+        "2.7.11", "prts___levels"
+    )
+
+
+def test_fbs_table_diff():
+    src_schema = parse_fbs(SAMPLE_FBS)
+    dst_schema = parse_fbs(
+        SAMPLE_FBS.replace("    big: long;\n", "    big: int;\n").replace(
+            "    items: [dict__string__int];\n",
+            "    items: [dict__string__int];\n    extra: string;\n",
+        )
+    )
+
+    table_diff = diff_fbs_table(src_schema.root_table, dst_schema.root_table)
+
+    assert [i.name for i in table_diff.added_field_lst] == ["extra"]
+    assert table_diff.removed_field_lst == []
+    assert [i.name for _, i in table_diff.changed_field_lst] == ["big"]
+
+    table_diff = diff_fbs_table(dst_schema.root_table, src_schema.root_table)
+
+    assert [i.name for i in table_diff.removed_field_lst] == ["extra"]
+
+
+def test_fbs_view():
+    schema = parse_fbs(SAMPLE_FBS)
+
+    obj = {
+        "name": "sample",
+        "big": 2**40,
+        "tags": ["a", "b"],
+        "items": [
+            {"key": "a", "value": 1},
+            {"key": "b", "value": 2},
+        ],
+    }
+
+    data = encode_fbs(obj, schema)
+
+    view = decode_fbs_view(data, schema)
+
+    assert view["name"] == "sample"
+    assert [i["key"] for i in view["items"]] == ["a", "b"]
+
+    assert encode_fbs_view(view, schema) == data
+
+    view["items"][1]["value"] = 3
+    view["items"].append({"key": "0", "value": 4})
+    view["tags"][0] = "c"
+    del view["big"]
+
+    assert decode_fbs(encode_fbs_view(view, schema), schema) == {
+        "name": "sample",
+        "tags": ["c", "b"],
+        "items": [
+            {"key": "0", "value": 4},
+            {"key": "a", "value": 1},
+            {"key": "b", "value": 3},
+        ],
+    }
+
+
+def test_fbs_view_patch():
+    schema = parse_fbs(SAMPLE_FBS)
+
+    obj = {
+        "name": "sample",
+        "ratio": 0.5,
+        "flags": [True, False],
+        "items": [
+            {"key": "a", "value": 1},
+            {"key": "b", "value": 2},
+        ],
+    }
+
+    data = encode_fbs(obj, schema)
+
+    view = decode_fbs_view(data, schema)
+
+    set_fbs_view_by_path(view, ["items", "b", "value"], 5)
+    set_fbs_view_by_path(view, ["flags", 1], True)
+    view["ratio"] = 0.25
+
+    patched_data = encode_fbs_view(view, schema)
+
+    assert len(patched_data) == len(data)
+    # only the bytes of the three patched scalars differ
+    assert sum(i != j for i, j in zip(patched_data, data)) <= 4 + 1 + 4
+
+    obj["items"][1]["value"] = 5
+    obj["flags"][1] = True
+    obj["ratio"] = 0.25
+
+    assert decode_fbs(patched_data, schema) == decode_fbs(
+        encode_fbs(obj, schema), schema
+    )
+
+    # an absent field falls back to re-encoding
+    view = decode_fbs_view(patched_data, schema)
+
+    set_fbs_view_by_path(view, ["kind"], "BAR")
+
+    obj["kind"] = "BAR"
+
+    assert decode_fbs(encode_fbs_view(view, schema), schema) == decode_fbs(
+        encode_fbs(obj, schema), schema
+    )
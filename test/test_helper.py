@@ -0,0 +1,268 @@
+import json
+import shutil
+import subprocess
+import threading
+import time
+from zipfile import BadZipFile, ZipFile
+
+import pytest
+
+from openbachelorm import helper
+from openbachelorm.fbs_helper import decode_fbs, load_fbs_schema
+from openbachelorm.helper import (
+    diff_hot_update_list,
+    download_asset,
+    download_asset_many,
+    encode_flatc_many,
+    extract_asset_dat,
+    get_asset_dat_filepath,
+    get_asset_filepath,
+    get_asset_store_filepath,
+    get_local_res_version_lst,
+    link_file,
+    seed_asset_store,
+    unlink_file,
+    write_file_atomic,
+    write_mod_from_file,
+)
+
+
+def mock_download_file(url, filepath):
+    asset_rel_filepath_str = url.rsplit("/", 1)[-1].replace("_", "/")
+
+    with ZipFile(filepath, "w") as zf:
+        zf.writestr(asset_rel_filepath_str.replace(".dat", ".ab"), url)
+
+
+def test_download_asset_many(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    lock = threading.Lock()
+    active_cnt = 0
+    max_active_cnt = 0
+    url_lst = []
+
+    def download_file(url, filepath):
+        nonlocal active_cnt, max_active_cnt
+
+        with lock:
+            active_cnt += 1
+            max_active_cnt = max(max_active_cnt, active_cnt)
+            url_lst.append(url)
+
+        time.sleep(0.05)
+
+        mock_download_file(url, filepath)
+
+        with lock:
+            active_cnt -= 1
+
+    monkeypatch.setattr(helper, "download_file", download_file)
+
+    asset_lst = [("1.0.0", f"dir/a{i}.ab", "Android") for i in range(6)]
+
+    filepath_lst = download_asset_many(asset_lst + asset_lst[:2])
+
+    assert len(url_lst) == 6
+    assert max_active_cnt > 1
+
+    assert filepath_lst[:6] == [get_asset_filepath(i, j) for i, j, _ in asset_lst]
+    assert all(i.read_text().endswith(".dat") for i in filepath_lst)
+
+    download_asset_many(asset_lst)
+
+    assert len(url_lst) == 6
+
+
+def test_download_asset_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    url_lst = []
+
+    def download_file(url, filepath):
+        url_lst.append(url)
+
+        mock_download_file(url, filepath)
+
+    monkeypatch.setattr(helper, "download_file", download_file)
+
+    asset_filepath = download_asset("1.0.0", "dir/a.ab", "Android", "abc123")
+
+    assert get_asset_store_filepath("abc123").samefile(asset_filepath)
+
+    other_asset_filepath = download_asset("1.0.1", "dir/a.ab", "Android", "abc123")
+
+    assert len(url_lst) == 1
+    assert other_asset_filepath.read_bytes() == asset_filepath.read_bytes()
+
+    download_asset("1.0.2", "dir/a.ab", "Android", "def456")
+    download_asset("1.0.3", "dir/a.ab", "Android", "../x")
+
+    assert len(url_lst) == 3
+    assert get_asset_store_filepath("../x") is None
+
+
+def test_extract_asset_dat(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    content = bytes(range(256)) * 1024
+
+    asset_dat_filepath = tmp_path / "a.dat"
+
+    with ZipFile(asset_dat_filepath, "w") as zf:
+        zf.writestr("dir/a.ab", content)
+
+    extract_asset_dat(asset_dat_filepath, "dir/a.ab", tmp_path / "a.ab")
+
+    assert (tmp_path / "a.ab").read_bytes() == content
+
+    # flip a byte of the stored member
+    dat_bytes = bytearray(asset_dat_filepath.read_bytes())
+    dat_bytes[dat_bytes.index(content[:256]) + 1000] ^= 0xFF
+    asset_dat_filepath.write_bytes(dat_bytes)
+
+    with pytest.raises(BadZipFile):
+        extract_asset_dat(asset_dat_filepath, "dir/a.ab", tmp_path / "b.ab")
+
+    monkeypatch.setitem(helper.config, "keep_asset_dat", True)
+    monkeypatch.setattr(helper, "download_file", mock_download_file)
+
+    asset_filepath = download_asset("1.0.0", "dir/a.ab", "Android")
+
+    with ZipFile(get_asset_dat_filepath("1.0.0", "dir/a.ab")) as zf:
+        assert zf.read("dir/a.ab") == asset_filepath.read_bytes()
+
+
+def test_diff_hot_update_list():
+    src_hot_update_list = {
+        "abInfos": [
+            {"name": "a.ab", "hash": "1"},
+            {"name": "b.ab", "hash": "2"},
+            {"name": "c.ab", "hash": "3"},
+            {"name": "d.ab"},
+        ]
+    }
+
+    dst_hot_update_list = {
+        "abInfos": [
+            {"name": "a.ab", "hash": "1"},
+            {"name": "b.ab", "hash": "22"},
+            {"name": "d.ab"},
+            {"name": "e.ab", "hash": "5"},
+        ]
+    }
+
+    diff = diff_hot_update_list(src_hot_update_list, dst_hot_update_list)
+
+    assert diff.unchanged_lst == ["a.ab"]
+    assert diff.changed_lst == ["b.ab", "d.ab"]
+    assert diff.added_lst == ["e.ab"]
+    assert diff.removed_lst == ["c.ab"]
+
+
+def test_seed_asset_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    url_lst = []
+
+    def download_file(url, filepath):
+        url_lst.append(url)
+
+        mock_download_file(url, filepath)
+
+    monkeypatch.setattr(helper, "download_file", download_file)
+    monkeypatch.setitem(helper.config, "asset_store", False)
+
+    for ab_name in ["a.ab", "b.ab"]:
+        download_asset("1.0.0", ab_name, "Android")
+
+    for res_version in ["1.0.0", "1.0.1"]:
+        hot_update_list_filepath = get_asset_filepath(
+            res_version, "hot_update_list.json"
+        )
+        hot_update_list_filepath.parent.mkdir(parents=True, exist_ok=True)
+        hot_update_list_filepath.write_text("{}")
+
+    assert get_local_res_version_lst() == ["1.0.0", "1.0.1"]
+
+    monkeypatch.setitem(helper.config, "asset_store", True)
+
+    diff = diff_hot_update_list(
+        {"abInfos": [{"name": "a.ab", "hash": "1"}, {"name": "b.ab", "hash": "2"}]},
+        {"abInfos": [{"name": "a.ab", "hash": "1"}, {"name": "b.ab", "hash": "22"}]},
+    )
+
+    assert seed_asset_store("1.0.0", diff, {"a.ab": "1", "b.ab": "22"}) == 1
+    assert seed_asset_store("1.0.0", diff, {"a.ab": "1", "b.ab": "22"}) == 0
+
+    download_asset("1.0.1", "a.ab", "Android", "1")
+    download_asset("1.0.1", "b.ab", "Android", "22")
+
+    assert len(url_lst) == 3
+    assert get_asset_filepath("1.0.1", "a.ab").samefile(
+        get_asset_filepath("1.0.0", "a.ab")
+    )
+
+
+def test_link_file_copy_on_write(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    src_filepath = tmp_path / "src.ab"
+    src_filepath.write_bytes(b"src" * 1024)
+
+    dst_filepath = tmp_path / "tmp" / "mod" / "dst.ab"
+
+    link_file(src_filepath, dst_filepath)
+
+    write_file_atomic(dst_filepath, b"dst")
+
+    assert src_filepath.read_bytes() == b"src" * 1024
+
+    link_file(src_filepath, dst_filepath)
+
+    unlink_file(dst_filepath)
+
+    with open(dst_filepath, "r+b") as f:
+        f.write(b"dst")
+
+    assert src_filepath.read_bytes() == b"src" * 1024
+
+    mod_filepath = tmp_path / "mod.zip"
+
+    write_mod_from_file(mod_filepath, "dst.ab", dst_filepath)
+
+    with ZipFile(mod_filepath) as zf:
+        assert zf.read("dst.ab") == dst_filepath.read_bytes()
+
+
+@pytest.mark.skipif(shutil.which("flatc") is None, reason="flatc not found")
+def test_encode_flatc_many_one_process(monkeypatch):
+    monkeypatch.setitem(helper.config, "flatc_subprocess", True)
+
+    run_arg_lst = []
+    subprocess_run = subprocess.run
+
+    def run(arg_lst, *args, **kwargs):
+        run_arg_lst.append(arg_lst)
+        return subprocess_run(arg_lst, *args, **kwargs)
+
+    monkeypatch.setattr(helper.subprocess, "run", run)
+
+    obj_dict = {
+        0: ({"characters": [{"key": "char_002_amiya"}]}, "character_table"),
+        1: (
+            {"charIdMasterListMap": [{"key": "a", "value": ["b"]}]},
+            "char_meta_table",
+        ),
+        2: ({"characters": [{"key": "char_1035_wisdel"}]}, "character_table"),
+    }
+
+    result_dict = encode_flatc_many(
+        {k: (json.dumps(obj), "2.7.61", v) for k, (obj, v) in obj_dict.items()}
+    )
+
+    # every schema of the client version in one flatc process
+    assert len(run_arg_lst) == 1
+
+    for k, (obj, fbs_name) in obj_dict.items():
+        assert decode_fbs(result_dict[k], load_fbs_schema("2.7.61", fbs_name)) == obj
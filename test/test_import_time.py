@@ -0,0 +1,51 @@
+import subprocess
+import sys
+import time
+
+from openbachelorm.level_helper import (
+    PRTS___LEVELS_CODEGEN_MODULE_DICT,
+    get_prts___levels,
+)
+
+IMPORT_CHECK_SCRIPT = """
+import sys
+import time
+
+start = time.perf_counter()
+
+import openbachelorm.level_helper
+
+print(time.perf_counter() - start)
+print(sum(1 for i in sys.modules if i.startswith("openbachelorm.fbs_codegen.")))
+"""
+
+
+def test_import_time():
+    start = time.perf_counter()
+
+    proc = subprocess.run(
+        [sys.executable, "-c", IMPORT_CHECK_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total_time = time.perf_counter() - start
+
+    import_time_str, codegen_module_cnt_str = proc.stdout.split()
+
+    print(
+        f"info: openbachelorm.level_helper imported in {float(import_time_str):.3f}s, "
+        f"interpreter total {total_time:.3f}s"
+    )
+
+    assert int(codegen_module_cnt_str) == 0
+
+
+def test_get_prts___levels():
+    client_version = next(iter(PRTS___LEVELS_CODEGEN_MODULE_DICT))
+
+    prts___levels = get_prts___levels(client_version)
+
+    assert prts___levels is get_prts___levels(client_version)
+    assert hasattr(prts___levels, "clz_Torappu_LevelDataT")
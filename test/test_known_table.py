@@ -1,4 +1,4 @@
-from openbachelorm.resource import Resource
+from openbachelorm.resource import Resource, TableMod
 from openbachelorm.helper import (
     nop_mod_table_func,
     get_known_table_decorator_lst,
@@ -17,16 +17,22 @@ def load_known_table(
 ):
     res = Resource(client_version, res_version, platform_name)
 
+    table_mod_lst: list[TableMod] = []
+
     for known_table in KnownTable:
         if not is_known_table_available(known_table, client_version):
             continue
-        res.mod_table(
-            known_table.value,
-            nop_mod_table_func,
-            get_known_table_decorator_lst(known_table, client_version, res_version),
-            table_asset_name_prefix=get_known_table_asset_name_prefix(known_table),
+        table_mod_lst.append(
+            TableMod(
+                known_table.value,
+                nop_mod_table_func,
+                get_known_table_decorator_lst(known_table, client_version, res_version),
+                table_asset_name_prefix=get_known_table_asset_name_prefix(known_table),
+            )
         )
 
+    res.mod_table_many(table_mod_lst)
+
 
 def test_known_table():
     load_known_table("2.4.01", get_last_res_version_android("2.4.01"))
@@ -0,0 +1,78 @@
+from openbachelorm import level_helper
+from openbachelorm.fbs_helper import decode_fbs, encode_fbs, load_fbs_schema
+from openbachelorm.helper import (
+    add_header,
+    bytes_to_script,
+    remove_header,
+    script_to_bytes,
+)
+from openbachelorm.level_helper import LEVEL_FBS_NAME, migrate_level
+
+SRC_CLIENT_VERSION = "2.5.04"
+DST_CLIENT_VERSION = "2.7.61"
+
+
+def get_level():
+    return {
+        "routes": [
+            {
+                "checkpoints": [
+                    {"type": "WAIT_FOR_SECONDS", "time": 1.0},
+                    # INVALID is 10 in 2.5.04, 10 is MAP_OFFSET_MOVE in 2.7.61
+                    {"type": "INVALID"},
+                ]
+            }
+        ],
+        "enemyDbRefs": [
+            {
+                "useDb": True,
+                "id": "enemy_1007_slime",
+                "overwrittenData": {
+                    "name": {"m_defined": True, "m_value": "slime"},
+                    # epResistance and viewRadius already exist in 2.5.04
+                    "attributes": {
+                        "maxHp": {"m_defined": True, "m_value": 1000},
+                    },
+                },
+            }
+        ],
+    }
+
+
+def migrate_sample_level(monkeypatch):
+    monkeypatch.setattr(level_helper, "dump_table", lambda *args: None)
+
+    level_str = bytes_to_script(
+        add_header(
+            encode_fbs(get_level(), load_fbs_schema(SRC_CLIENT_VERSION, LEVEL_FBS_NAME))
+        )
+    )
+
+    level_str = migrate_level(
+        "level_sample", SRC_CLIENT_VERSION, DST_CLIENT_VERSION, "res", level_str
+    )
+
+    return decode_fbs(
+        remove_header(script_to_bytes(level_str)),
+        load_fbs_schema(DST_CLIENT_VERSION, LEVEL_FBS_NAME),
+    )
+
+
+def test_migrate_level_renumbered_enum(monkeypatch):
+    level = migrate_sample_level(monkeypatch)
+
+    checkpoint_lst = level["routes"][0]["checkpoints"]
+
+    assert [i["type"] for i in checkpoint_lst] == ["WAIT_FOR_SECONDS", "INVALID"]
+
+
+def test_migrate_level_fill_undefinable(monkeypatch):
+    level = migrate_sample_level(monkeypatch)
+
+    enemy_data = level["enemyDbRefs"][0]["overwrittenData"]
+
+    assert enemy_data["attributes"]["maxHp"] == {"m_defined": True, "m_value": 1000}
+    assert enemy_data["attributes"]["epResistance"] == {}
+    assert enemy_data["attributes"]["groundBoundImmune"] == {}
+    assert enemy_data["viewRadius"] == {}
+    assert enemy_data["applyWay"] == {}
@@ -0,0 +1,37 @@
+from openbachelorm import manifest
+from openbachelorm.helper import link_file
+from openbachelorm.manifest import ManifestMerger, MergerBundle
+
+
+def test_materialize_merger_bundle(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    content = b"bundle" * 1024
+
+    store_filepath = tmp_path / "asset_store" / "ab" / "abc123"
+    store_filepath.parent.mkdir(parents=True)
+    store_filepath.write_bytes(content)
+
+    asset_filepath = tmp_path / "asset" / "1.0.0" / "a.ab"
+
+    link_file(store_filepath, asset_filepath)
+
+    monkeypatch.setattr(manifest, "download_bundle", lambda bundle: asset_filepath)
+    monkeypatch.setattr(ManifestMerger, "prefetch_merger_bundle", lambda self: None)
+
+    mgr = ManifestMerger.__new__(ManifestMerger)
+    mgr.mod_name = "test_mod"
+    mgr.merger_bundle_dict = {"a.ab": MergerBundle(bundle=None)}
+    mgr.merger_bundle_stat_dict = {}
+
+    mgr.prep_merger_bundle()
+
+    assert mgr.get_merger_bundle_filepath("a.ab").read_bytes() == content
+
+    mgr.materialize_merger_bundle("a.ab").write_bytes(b"modded")
+
+    assert store_filepath.read_bytes() == content
+    assert asset_filepath.read_bytes() == content
+
+    assert mgr.get_merger_bundle_filepath("a.ab").read_bytes() == b"modded"
+    assert mgr.merger_bundle_stat_dict["a.ab"] != mgr.get_merger_bundle_stat("a.ab")
@@ -0,0 +1,76 @@
+from copy import deepcopy
+
+from openbachelorm.fbs_helper import encode_fbs, load_fbs_schema
+from openbachelorm.helper import fbs_view_decorator
+from openbachelorm.resource import Resource
+
+CLIENT_VERSION = "2.7.61"
+
+CHARACTER_TABLE = "character_table"
+
+DATA_PATH = [
+    "characters",
+    "char_1035_wisdel",
+    "value",
+    "phases",
+    -1,
+    "attributesKeyFrames",
+    -1,
+    "data",
+]
+
+
+class MockTextAsset:
+    def __init__(self, m_Script: bytes):
+        self.m_Script = m_Script
+        self.saved = False
+
+    def save(self):
+        self.saved = True
+
+
+def get_character_data(max_hp: int, atk: int, cost: int):
+    return {
+        "phases": [
+            {
+                "attributesKeyFrames": [
+                    {"level": 1, "data": {"maxHp": 1, "atk": 1, "cost": 1}},
+                    {"level": 90, "data": {"maxHp": max_hp, "atk": atk, "cost": cost}},
+                ]
+            }
+        ]
+    }
+
+
+def test_patch_table(monkeypatch):
+    schema = load_fbs_schema(CLIENT_VERSION, CHARACTER_TABLE)
+
+    obj = {
+        "characters": [
+            {"key": "char_002_amiya", "value": get_character_data(1000, 100, 10)},
+            {"key": "char_1035_wisdel", "value": get_character_data(2000, 200, 20)},
+        ]
+    }
+
+    data = MockTextAsset(encode_fbs(obj, schema))
+
+    monkeypatch.setattr(Resource, "load_table_data", lambda self, *args: data)
+
+    res = Resource.__new__(Resource)
+
+    res.patch_table(
+        CHARACTER_TABLE,
+        [
+            ([*DATA_PATH, "maxHp"], lambda v: v * 100),
+            ([*DATA_PATH, "atk"], lambda v: v * 100),
+            ([*DATA_PATH, "cost"], 1),
+        ],
+        [fbs_view_decorator(CLIENT_VERSION, CHARACTER_TABLE)],
+    )
+
+    patched_obj = deepcopy(obj)
+    patched_obj["characters"][1]["value"] = get_character_data(200000, 20000, 1)
+
+    assert data.saved
+    # patched in place, byte for byte what a full re-encode gives
+    assert data.m_Script == encode_fbs(patched_obj, schema)